@@ -0,0 +1,57 @@
+"""
+Insert and query throughput of utils.db.Database under concurrent coroutines.
+
+Usage: python -m benchmarks.db_throughput [coroutines] [ops_per_coroutine]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from utils.db import Database
+
+
+async def run(batch_size: int, workers: int, ops: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"), batch_size=batch_size)
+        await db.connect()
+
+        async def writer(n):
+            for i in range(ops):
+                await db.execute(
+                    "INSERT INTO claim (role_id, guild, claim_time) VALUES (?, ?, ?)",
+                    (i, n, int(time.time())),
+                )
+
+        async def reader(n):
+            for i in range(ops):
+                await db.fetchone("SELECT COUNT(*) FROM claim WHERE guild = ?", (n,))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(n) for n in range(workers)))
+        insert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(reader(n) for n in range(workers)))
+        query_time = time.perf_counter() - start
+
+        await db.close()
+
+    total = workers * ops
+    print(
+        f"batch_size={batch_size:<4} inserts: {total / insert_time:>9.0f}/s   "
+        f"queries: {total / query_time:>9.0f}/s"
+    )
+
+
+async def main() -> None:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"{workers} coroutines x {ops} operations")
+    for batch_size in (1, 256):
+        await run(batch_size, workers, ops)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
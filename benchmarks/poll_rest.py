@@ -0,0 +1,217 @@
+"""
+REST calls per 1,000 poll votes, against mocked Discord objects that
+count every call: the reaction flow (DM per vote, bot-side reaction
+removal and re-adds) against button voting (one interaction response
+per vote plus throttled results edits). Both paths replay the same
+sequence of new votes, changed votes and withdrawn votes through the
+real Poll cog handlers.
+
+The refresh window and the time the votes are spread over are scaled
+by ``SCALE`` so a run takes seconds rather than minutes.
+
+Usage: python -m benchmarks.poll_rest [votes] [seconds] [window]
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+
+import discord
+
+from cogs.poll import NUMBER_EMOJIS, Poll
+from utils.db import Database
+
+SCALE = 0.05
+OPTIONS = ["Red", "Green", "Blue", "Yellow"]
+
+
+class Rest:
+    def __init__(self) -> None:
+        self.calls = Counter()
+
+    def call(self, route: str) -> None:
+        self.calls[route] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeUser:
+    def __init__(self, rest: Rest, user_id: int) -> None:
+        self.rest = rest
+        self.id = user_id
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+        self.dm_open = False
+
+    async def send(self, *args, **kwargs):
+        if not self.dm_open:
+            self.rest.call("POST /users/@me/channels")
+            self.dm_open = True
+        self.rest.call("POST /channels/{dm}/messages")
+
+
+class FakeMessage:
+    def __init__(self, rest: Rest, gateway: list, message_id: int, channel_id: int) -> None:
+        self.rest = rest
+        self.gateway = gateway
+        self.id = message_id
+        self.channel_id = channel_id
+
+    async def add_reaction(self, emoji):
+        self.rest.call("PUT /channels/{id}/messages/{id}/reactions/{emoji}/@me")
+
+    async def remove_reaction(self, emoji, member):
+        self.rest.call("DELETE /channels/{id}/messages/{id}/reactions/{emoji}/{user}")
+        self.gateway.append(payload(member.id, self.id, self.channel_id, str(emoji)))
+
+    async def edit(self, **kwargs):
+        self.rest.call("PATCH /channels/{id}/messages/{id}")
+
+
+class FakeChannel:
+    def __init__(self, message: FakeMessage) -> None:
+        self.message = message
+
+    def get_partial_message(self, message_id: int):
+        return self.message
+
+
+class FakeResponse:
+    def __init__(self, rest: Rest) -> None:
+        self.rest = rest
+
+    async def send_message(self, *args, **kwargs):
+        self.rest.call("POST /interactions/{id}/{token}/callback")
+
+
+class FakeInteraction:
+    def __init__(self, rest: Rest, user: FakeUser, message: FakeMessage) -> None:
+        self.user = user
+        self.message = message
+        self.response = FakeResponse(rest)
+
+
+class FakeBot:
+    def __init__(self, db: Database, window: float) -> None:
+        self.db = db
+        self.cfg = {"poll_refresh_window": window}
+        self.user = discord.Object(1)
+        self.logger = logging.getLogger("discord_bot")
+        self.users = {}
+        self.channel = None
+
+    def get_user(self, user_id: int):
+        return self.users.get(user_id)
+
+    def get_partial_messageable(self, channel_id: int, guild_id: int = None):
+        return self.channel
+
+
+def payload(user_id, message_id, channel_id, emoji, member=None):
+    event = discord.RawReactionActionEvent.__new__(discord.RawReactionActionEvent)
+    event.user_id = user_id
+    event.message_id = message_id
+    event.channel_id = channel_id
+    event.emoji = discord.PartialEmoji(name=emoji)
+    event.member = member
+    return event
+
+
+def actions(count: int, users: int, seed: int = 7) -> list:
+    """``(user, option)`` presses; a press on your current option withdraws the vote."""
+    rng = random.Random(seed)
+    current = {}
+    result = []
+    for _ in range(count):
+        user = rng.randrange(users)
+        if user in current and rng.random() < 0.4:
+            idx = current.pop(user)
+        else:
+            idx = rng.randrange(len(OPTIONS))
+            if current.get(user) == idx:
+                idx = (idx + 1) % len(OPTIONS)
+            current[user] = idx
+        result.append((user + 100, idx))
+    return result
+
+
+async def run(mode: str, presses: list, interval: float, window: float) -> None:
+    rest = Rest()
+    gateway = []
+    with tempfile.TemporaryDirectory() as root:
+        db = Database(os.path.join(root, "bench.db"))
+        await db.connect()
+        bot = FakeBot(db, window)
+        cog = Poll(bot)
+        poll = await cog.engine.create(1, 2, 3, "Favourite colour?", OPTIONS, mode=mode)
+        await cog.engine.attach(poll, 4)
+        message = FakeMessage(rest, gateway, 4, 2)
+        bot.channel = FakeChannel(message)
+        for user_id, _ in presses:
+            bot.users.setdefault(user_id, FakeUser(rest, user_id))
+
+        for user_id, idx in presses:
+            user = bot.users[user_id]
+            if mode == "buttons":
+                await cog.button_vote(FakeInteraction(rest, user, message), poll.id, idx)
+            else:
+                await react(cog, user, message, poll, idx, gateway)
+            await asyncio.sleep(interval)
+        await cog.refresher.flush()
+        cog.refresher.close()
+
+        assert sum(poll.counts) == len(poll.voters)
+        await db.close()
+
+    per_thousand = rest.total * 1000 / len(presses)
+    print(f"{mode:>9}: {rest.total:6d} REST calls, {per_thousand:7.0f} per 1,000 votes")
+    for route, calls in sorted(rest.calls.items()):
+        print(f"           {calls:6d}  {route}")
+
+
+async def react(cog, user, message, poll, idx, gateway) -> None:
+    """Replay the reaction events a user generates to reach the vote the button press would."""
+    current = poll.voters.get(user.id)
+    emoji = NUMBER_EMOJIS[idx]
+    if current == idx:
+        await cog.on_raw_reaction_remove(payload(user.id, message.id, message.channel_id, emoji))
+        return
+    if current is not None:
+        # Adding the new option first is rejected and the reaction removed
+        # by the bot; the user then removes the old one and adds it again.
+        await cog.on_raw_reaction_add(payload(user.id, message.id, message.channel_id, emoji, user))
+        while gateway:
+            await cog.on_raw_reaction_remove(gateway.pop())
+        await cog.on_raw_reaction_remove(payload(user.id, message.id, message.channel_id, NUMBER_EMOJIS[current]))
+    await cog.on_raw_reaction_add(payload(user.id, message.id, message.channel_id, emoji, user))
+
+
+def main() -> None:
+    logging.getLogger("discord_bot").setLevel(logging.ERROR)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 120.0
+    window = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    presses = actions(count, users=max(count // 3, 1))
+    kinds = Counter()
+    voters = {}
+    for user_id, idx in presses:
+        previous = voters.get(user_id)
+        kinds["withdrawn" if previous == idx else "changed" if previous is not None else "new"] += 1
+        if previous == idx:
+            del voters[user_id]
+        else:
+            voters[user_id] = idx
+    print(f"{count} votes over {seconds:.0f} s ({', '.join(f'{n} {kind}' for kind, n in kinds.items())}), "
+          f"{window:.1f} s refresh window")
+    interval = seconds * SCALE / count
+    for mode in ("reactions", "buttons"):
+        asyncio.run(run(mode, presses, interval, window * SCALE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+REST round-trips and wall time per ticket, against a mocked Discord HTTP
+layer where every call takes a fixed latency: the previous sequential
+flow against TicketCog.open_ticket. Also fires double-clicks to count
+duplicate channels.
+
+Usage: python -m benchmarks.ticket_rest [tickets] [latency_ms]
+"""
+import asyncio
+import itertools
+import logging
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from cogs.ticket import TicketCog
+from utils.storage import Storage
+
+ids = itertools.count(1000)
+
+
+class Rest:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = Counter()
+
+    async def call(self, route: str) -> None:
+        self.calls[route] += 1
+        await asyncio.sleep(self.latency)
+
+
+class FakeObject:
+    def __init__(self, **attrs) -> None:
+        self.id = next(ids)
+        self.__dict__.update(attrs)
+
+    def __hash__(self) -> int:
+        return self.id
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FakeObject) and other.id == self.id
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+
+class FakeChannel(FakeObject):
+    async def send(self, *args, **kwargs):
+        await self.rest.call("POST /channels/{id}/messages")
+
+    async def set_permissions(self, *args, **kwargs):
+        await self.rest.call("PUT /channels/{id}/permissions/{target}")
+
+
+class FakeGuild(FakeObject):
+    def __init__(self, rest: Rest) -> None:
+        super().__init__(rest=rest, name="guild", default_role=FakeObject(), me=FakeObject())
+        self.channels = {}
+
+    def get_role(self, role_id: int):
+        return None
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def create_text_channel(self, name, category=None, overwrites=None):
+        await self.rest.call("POST /guilds/{id}/channels")
+        channel = FakeChannel(rest=self.rest, name=name, guild=self)
+        self.channels[channel.id] = channel
+        return channel
+
+
+class FakeResponse:
+    def __init__(self, rest: Rest) -> None:
+        self.rest = rest
+
+    async def defer(self, *args, **kwargs):
+        await self.rest.call("POST /interactions/{id}/{token}/callback")
+
+
+class FakeFollowup:
+    def __init__(self, rest: Rest) -> None:
+        self.rest = rest
+
+    async def send(self, *args, **kwargs):
+        await self.rest.call("POST /webhooks/{id}/{token}")
+
+
+class FakeInteraction:
+    def __init__(self, rest: Rest, guild: FakeGuild, user: FakeObject) -> None:
+        self.guild = guild
+        self.user = user
+        self.response = FakeResponse(rest)
+        self.followup = FakeFollowup(rest)
+
+
+class FakeDatabase:
+    """Local SQLite writes aren't REST calls; accept and drop them."""
+
+    async def run(self, func):
+        return None
+
+    async def execute(self, sql: str, params=()):
+        return None
+
+
+class FakeBot:
+    def __init__(self, root: str) -> None:
+        self.storage = Storage(root=root)
+        self.db = FakeDatabase()
+        self.cfg = {}
+        self.logger = logging.getLogger("benchmark")
+
+
+def make_user() -> FakeObject:
+    user = FakeObject(name="User")
+    user.display_avatar = user.avatar = FakeObject(url="https://cdn.discordapp.com/embed/avatars/0.png")
+    return user
+
+
+async def legacy_open(cog: TicketCog, interaction: FakeInteraction) -> None:
+    """The flow before this change: every call awaited in turn, no guard."""
+    await interaction.response.defer()
+    guild = interaction.guild
+    existing = cog.registry.open_for(guild.id, interaction.user.id)
+    if existing is not None and guild.get_channel(existing.channel_id) is not None:
+        await interaction.followup.send("You already have an open ticket", ephemeral=True)
+        return
+    channel = await guild.create_text_channel(name="ticket", category=cog.get_ticket_category(guild), overwrites={})
+    cog.registry.add(channel.id, guild.id, interaction.user.id)
+    await channel.send(content=interaction.user.mention)
+    await interaction.followup.send("Your ticket has been created", ephemeral=True)
+    await channel.set_permissions(interaction.user, read_messages=True, send_messages=True)
+    await channel.set_permissions(guild.default_role, read_messages=False)
+    log_channel = cog.get_log_channel(guild)
+    if log_channel:
+        await log_channel.send(content="Ticket Created")
+
+
+async def run(label: str, opener, count: int, latency: float) -> None:
+    rest = Rest(latency)
+    guild = FakeGuild(rest)
+    category = FakeChannel(rest=rest, name="tickets", guild=guild)
+    log_channel = FakeChannel(rest=rest, name="logs", guild=guild)
+    guild.channels.update({category.id: category, log_channel.id: log_channel})
+    with tempfile.TemporaryDirectory() as root:
+        cog = TicketCog(FakeBot(root))
+        await cog.update_settings(guild.id, ticket_category_id=category.id, ticket_log_channel_id=log_channel.id)
+
+        started = time.perf_counter()
+        for _ in range(count):
+            await opener(cog, FakeInteraction(rest, guild, make_user()))
+        elapsed = time.perf_counter() - started
+        calls = sum(rest.calls.values())
+
+        user = make_user()
+        before = len(guild.channels)
+        await asyncio.gather(*(opener(cog, FakeInteraction(rest, guild, user)) for _ in range(2)))
+        duplicates = len(guild.channels) - before
+
+    print(f"{label:<10} {calls / count:>6.1f} calls/ticket {elapsed / count * 1000:>8.1f} ms/ticket   double-click -> {duplicates} channel(s)")
+    for route, n in sorted(rest.calls.items()):
+        print(f"    {route:<42} {n}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 40.0) / 1000
+    print(f"{count} tickets, {latency * 1000:.0f} ms per REST call")
+    asyncio.run(run("legacy", legacy_open, count, latency))
+    asyncio.run(run("current", TicketCog.open_ticket, count, latency))
+
+
+if __name__ == "__main__":
+    main()
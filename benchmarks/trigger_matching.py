@@ -0,0 +1,93 @@
+"""
+Auto-respond matching cost with many triggers: TriggerIndex against a
+linear scan over every trigger.
+
+Usage: python -m benchmarks.trigger_matching [triggers] [messages]
+"""
+import random
+import re
+import sys
+import time
+
+from utils.triggers import MODES, TriggerIndex
+
+WORDS = (
+    "the a to and is it you that of in for on this i be are with just not have was so but what "
+    "server minecraft ticket help pls anyone how do join play game lol lmao gg bro mod admin "
+    "ban mute role channel voice online update event giveaway nitro bot command prefix error "
+    "discord link invite rules welcome thanks hello hi hey morning night today tomorrow week"
+).split()
+
+
+def random_token(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+
+
+def build_triggers(rng: random.Random, count: int) -> list:
+    triggers, seen = [], set()
+    while len(triggers) < count:
+        mode = MODES[len(triggers) % len(MODES)]
+        words = [rng.choice(WORDS) if rng.random() < 0.02 else random_token(rng) for _ in range(rng.randint(1, 3))]
+        trigger = " ".join(words)
+        if mode == "wildcard":
+            trigger = f"{words[0]}*{random_token(rng)}"
+        if trigger not in seen:
+            seen.add(trigger)
+            triggers.append((trigger, mode))
+    return triggers
+
+
+def build_messages(rng: random.Random, count: int) -> list:
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 30))) for _ in range(count)]
+
+
+def naive_match(triggers: list, text: str):
+    for trigger, mode, regex in triggers:
+        if mode == "exact" and text == trigger:
+            return trigger
+        if mode == "contains" and trigger in text:
+            return trigger
+        if mode in ("word", "wildcard") and regex.search(text):
+            return trigger
+    return None
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    message_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    rng = random.Random(42)
+    triggers = build_triggers(rng, count)
+    messages = build_messages(rng, message_count)
+
+    start = time.perf_counter()
+    index = TriggerIndex()
+    for trigger, mode in triggers:
+        index.add(trigger, trigger, mode)
+    index.match("")
+    build_time = time.perf_counter() - start
+
+    compiled = []
+    for trigger, mode in triggers:
+        if mode == "word":
+            regex = re.compile(rf"(?<!\w){re.escape(trigger)}(?!\w)")
+        elif mode == "wildcard":
+            regex = re.compile("^" + ".*".join(re.escape(p) for p in trigger.split("*")) + "$", re.DOTALL)
+        else:
+            regex = None
+        compiled.append((trigger, mode, regex))
+
+    start = time.perf_counter()
+    indexed_hits = sum(index.match(text) is not None for text in messages)
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive_hits = sum(naive_match(compiled, text) is not None for text in messages)
+    naive_time = time.perf_counter() - start
+
+    print(f"{count} triggers, {message_count} messages (index built in {build_time * 1000:.1f} ms)")
+    print(f"TriggerIndex: {indexed_time / message_count * 1e6:>9.1f} us/message  ({indexed_hits} hits)")
+    print(f"linear scan:  {naive_time / message_count * 1e6:>9.1f} us/message  ({naive_hits} hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,11 @@ import sys
 import discord
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
+from utils.db import Database
+from utils.http import HTTPClient
+from utils.pipeline import MessagePipeline
+from utils.preview import PreviewRenderer
+from utils.storage import Storage
 os.system("cls")
 cfgpth = f"{os.path.realpath(os.path.dirname(__file__))}/config.json"
 if not os.path.isfile(cfgpth):
@@ -68,27 +73,27 @@ class DiscordBot(commands.Bot):
         self.logger = logger
         self.cfg = cfg
         self.db = None
+        self.storage = Storage(
+            flush_interval=cfg.get("storage_flush_interval", 5.0),
+            max_pending=cfg.get("storage_max_pending", 50),
+        )
+        self.pipeline = MessagePipeline()
+        self.http_client = HTTPClient(
+            limit_per_host=cfg.get("http_limit_per_host", 10),
+            timeout=cfg.get("http_timeout", 10.0),
+            retries=cfg.get("http_retries", 2),
+            max_retry_delay=cfg.get("http_max_retry_delay", 10.0),
+        )
+        self.previews = PreviewRenderer(window=cfg.get("preview_edit_window", 1.0))
+        self.pipeline.register("commands", self.commands_stage)
 
     async def setup_db(self) -> None:
-        import sqlite3
-        self.db = sqlite3.connect('your_database_file.db')
-        c = self.db.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS claim (
-                        role_id INTEGER, 
-                        guild INTEGER, 
-                        claim_time INTEGER
-                    )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS gw (
-                        c_id INTEGER, 
-                        m_id INTEGER, 
-                        end REAL, 
-                        winners INTEGER, 
-                        prize TEXT, 
-                        host INTEGER, 
-                        ended BOOLEAN
-                    )''')
-        self.db.commit()
-        c.close()
+        self.db = Database(
+            cfg.get("database_path", "your_database_file.db"),
+            pool_size=cfg.get("database_pool_size", 4),
+        )
+        await self.db.connect()
+        self.logger.info(f"Database ready at schema version {self.db.schema_version}")
 
     async def load_cogs(self) -> None:
         base_dir = os.path.realpath(os.path.dirname(__file__)) + '/cogs'
@@ -117,14 +122,29 @@ class DiscordBot(commands.Bot):
 
     async def setup_hook(self) -> None:
         await self.setup_db()
+        self.storage.start()
+        await self.http_client.start()
         self.logger.info(f"Logged in as {self.user.name}")
         await self.load_cogs()
         self.status_task.start()
 
+    async def close(self) -> None:
+        # Unload cogs and stop the gateway first, so their last writes
+        # still reach storage and the database before those close.
+        await super().close()
+        self.previews.close()
+        await self.storage.close()
+        await self.http_client.close()
+        if self.db is not None:
+            await self.db.close()
+
+    async def commands_stage(self, ctx) -> None:
+        await self.process_commands(ctx.message)
+
     async def on_message(self, message: discord.Message) -> None:
-        if message.author == self.user or message.author.bot:
+        if message.author.bot:
             return
-        await self.process_commands(message)
+        await self.pipeline.dispatch(message)
 
     async def on_command_completion(self, ctx: Context) -> None:
         cmd = ctx.command.qualified_name.split(" ")[0]
@@ -1,51 +1,181 @@
+import sys
+import time
+from collections import deque
+from datetime import datetime
 import discord
 from discord.ext import commands
-import json
-import os
+from utils.coalesce import Coalescer
+
+class PingRecord:
+    __slots__ = ("author_id", "channel_id", "time", "snippet")
+
+    def __init__(self, author_id, channel_id, time, snippet):
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.time = time
+        self.snippet = snippet
+
+    def pack(self):
+        return [self.author_id, self.channel_id, self.time, self.snippet]
+
+class PingDigest:
+    """
+    Pings for one AFK user within a digest window: a total count and the
+    last ``keep`` as compact ``(author, channel, text)`` entries, so a
+    mention raid can't pile up Message objects.
+    """
+
+    __slots__ = ("count", "recent")
+
+    def __init__(self, keep=10):
+        self.count = 0
+        self.recent = deque(maxlen=keep)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, message):
+        self.count += 1
+        self.recent.append((str(message.author), str(message.channel), message.content[:1024] or message.jump_url))
+
+class AfkRecord:
+    __slots__ = ("user_id", "guild_id", "username", "since", "pings")
+
+    def __init__(self, user_id, guild_id, username, since, max_pings):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.username = username
+        self.since = since
+        self.pings = deque(maxlen=max_pings)
+
+    def pack(self):
+        return [self.guild_id, self.username, self.since]
+
+class AfkStore:
+    """
+    Int-keyed AFK state with a per-guild index for mention lookups.
+
+    Each AFK user keeps only the last ``max_pings`` pings, with message
+    content cut to ``snippet_length``. The JSON document is kept in a
+    compact list form and updated in place as records change.
+    """
+
+    def __init__(self, store, max_pings=10, snippet_length=200):
+        self.store = store
+        self.max_pings = max_pings
+        self.snippet_length = snippet_length
+        self.users = {}
+        self.by_guild = {}
+        # Records carried over from the old format, which had no guild.
+        self.anywhere = set()
+        self.load()
+
+    def load(self):
+        data = self.store.data
+        if 'afk_users' in data:
+            for user_id, entry in data.pop('afk_users').items():
+                try:
+                    since = datetime.fromisoformat(entry['afk_since']).timestamp()
+                except (KeyError, ValueError):
+                    since = time.time()
+                self._add(AfkRecord(int(user_id), 0, entry.get('username', ''), since, self.max_pings))
+            data.pop('ping_records', None)
+            data['afk'] = {str(r.user_id): r.pack() for r in self.users.values()}
+            data['pings'] = {}
+            self.store.mark_dirty()
+            return
+
+        data.setdefault('afk', {})
+        data.setdefault('pings', {})
+        for user_id, (guild_id, username, since) in data['afk'].items():
+            record = AfkRecord(int(user_id), guild_id, username, since, self.max_pings)
+            for ping in data['pings'].get(user_id, [])[-self.max_pings:]:
+                record.pings.append(PingRecord(*ping))
+            self._add(record)
+
+    def _add(self, record):
+        self.users[record.user_id] = record
+        if record.guild_id:
+            self.by_guild.setdefault(record.guild_id, set()).add(record.user_id)
+        else:
+            self.anywhere.add(record.user_id)
+
+    def set_afk(self, user_id, guild_id, username):
+        self.clear(user_id)
+        record = AfkRecord(user_id, guild_id, username, time.time(), self.max_pings)
+        self._add(record)
+        self.store.data['afk'][str(user_id)] = record.pack()
+        self.store.mark_dirty()
+        return record
+
+    def clear(self, user_id):
+        record = self.users.pop(user_id, None)
+        if record is None:
+            return None
+        guild_set = self.by_guild.get(record.guild_id)
+        if guild_set is not None:
+            guild_set.discard(user_id)
+            if not guild_set:
+                del self.by_guild[record.guild_id]
+        self.anywhere.discard(user_id)
+        self.store.data['afk'].pop(str(user_id), None)
+        self.store.data['pings'].pop(str(user_id), None)
+        self.store.mark_dirty()
+        return record
+
+    def mentioned(self, guild_id, mention_ids):
+        """Return the ids of AFK users among ``mention_ids`` in ``guild_id``."""
+        hits = mention_ids & self.by_guild.get(guild_id, frozenset())
+        if self.anywhere:
+            hits = hits | (mention_ids & self.anywhere)
+        return hits
+
+    def add_ping(self, user_id, author_id, channel_id, content):
+        record = self.users[user_id]
+        ping = PingRecord(author_id, channel_id, time.time(), content[:self.snippet_length])
+        record.pings.append(ping)
+        self.store.data['pings'][str(user_id)] = [p.pack() for p in record.pings]
+        self.store.mark_dirty()
+        return ping
+
+    def memory_usage(self):
+        total = sys.getsizeof(self.users) + sys.getsizeof(self.by_guild) + sys.getsizeof(self.anywhere)
+        total += sum(sys.getsizeof(s) for s in self.by_guild.values())
+        pings = 0
+        for record in self.users.values():
+            total += sys.getsizeof(record) + sys.getsizeof(record.username) + sys.getsizeof(record.pings)
+            for ping in record.pings:
+                total += sys.getsizeof(ping) + sys.getsizeof(ping.snippet)
+                pings += 1
+        return total, pings
 
 class AFKCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config_file_path = os.path.join('database', 'afk.json')
-        self.load_config()
+        self.afk_store = AfkStore(
+            bot.storage.open('afk.json', {'afk': {}, 'pings': {}}, indent=None),
+            max_pings=bot.cfg.get('afk_max_pings', 10)
+        )
+        # One channel notice per window, one digest DM per AFK user per window.
+        self.notices = Coalescer(bot.cfg.get('afk_notice_window', 3.0), self.send_notice)
+        self.digests = Coalescer(bot.cfg.get('afk_digest_window', 60.0), self.send_digest, PingDigest)
 
-    def load_config(self):
-        try:
-            if os.path.exists(self.config_file_path):
-                with open(self.config_file_path, 'r') as f:
-                    self.config = json.load(f)
-            else:
-                self.config = {
-                    'afk_users': {},
-                    'ping_records': {}
-                }
-        except json.JSONDecodeError as e:
-            print(f"Error loading JSON configuration: {e}")
-            self.config = {
-                'afk_users': {},
-                'ping_records': {}
-            }
-        except Exception as e:
-            print(f"An unexpected error occurred while loading the configuration: {e}")
-            self.config = {
-                'afk_users': {},
-                'ping_records': {}
-            }
-
-    def save_config(self):
-        if not os.path.exists('database'):
-            os.makedirs('database')
-        with open(self.config_file_path, 'w') as f:
-            json.dump(self.config, f, indent=4)
+    async def cog_load(self):
+        self.bot.pipeline.register("afk", self.handle_message, self.wants_message)
+
+    async def cog_unload(self):
+        self.bot.pipeline.unregister("afk")
+        await self.notices.close()
+        await self.digests.close()
+
+    def wants_message(self, ctx):
+        if ctx.author_id in self.afk_store.users:
+            return True
+        return bool(ctx.mention_ids) and bool(self.afk_store.mentioned(ctx.guild_id, ctx.mention_ids))
 
     @commands.hybrid_command(name="afk", description="Set yourself as AFK")
     async def afk(self, ctx: commands.Context):
-        user_id = str(ctx.author.id)
-        self.config['afk_users'][user_id] = {
-            'username': str(ctx.author),
-            'afk_since': discord.utils.utcnow().isoformat()
-        }
-        self.save_config()
+        self.afk_store.set_afk(ctx.author.id, ctx.guild.id if ctx.guild else 0, str(ctx.author))
 
         embed = discord.Embed(
             title="AFK Status",
@@ -55,58 +185,105 @@ class AFKCog(commands.Cog):
         embed.set_footer(text="AFK System")
         await ctx.send(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
-            return
+    @commands.hybrid_command(name="afkstats", description="Show AFK store memory usage")
+    @commands.is_owner()
+    async def afkstats(self, ctx: commands.Context):
+        size, pings = self.afk_store.memory_usage()
+        embed = discord.Embed(
+            title="AFK Store",
+            description=(
+                f"**AFK users:** {len(self.afk_store.users)}\n"
+                f"**Guilds indexed:** {len(self.afk_store.by_guild)}\n"
+                f"**Stored pings:** {pings}\n"
+                f"**Approx. memory:** {size / 1024:.1f} KiB"
+            ),
+            color=discord.Color.orange()
+        )
+        embed.set_footer(text="AFK System")
+        await ctx.send(embed=embed)
+
+    async def handle_message(self, ctx):
+        message = ctx.message
 
         # Check if the author is AFK
-        if str(message.author.id) in self.config['afk_users']:
+        record = self.afk_store.clear(ctx.author_id)
+        if record is not None:
             # Notify the author
             embed = discord.Embed(
                 title="AFK Status Removed",
                 description="I've removed your AFK status since you sent a message.",
                 color=discord.Color.green()
             )
+            if record.pings:
+                embed.add_field(
+                    name=f"Pings while you were away ({len(record.pings)} most recent)",
+                    value="\n".join(f"<@{p.author_id}> in <#{p.channel_id}>" for p in record.pings),
+                    inline=False
+                )
             embed.set_footer(text="AFK System")
             await message.author.send(embed=embed)
-            # Remove the user from the AFK list
-            del self.config['afk_users'][str(message.author.id)]
-            self.save_config()
 
         # Check if any user is pinged and is AFK
-        for user in message.mentions:
-            if str(user.id) in self.config['afk_users']:
-                # Delete the message
-                await message.delete()
-                # Notify the sender
-                embed = discord.Embed(
-                    title="User AFK",
-                    description=f"{user.mention} is currently AFK. Please try again later.",
-                    color=discord.Color.red()
-                )
-                embed.set_footer(text="AFK System")
-                await message.channel.send(embed=embed)
-
-                # Record the ping
-                ping_record = self.config['ping_records'].get(str(user.id), [])
-                ping_record.append({
-                    'user': str(message.author),
-                    'message': message.content,
-                    'time': discord.utils.utcnow().isoformat()
-                })
-                self.config['ping_records'][str(user.id)] = ping_record
-                self.save_config()
-
-                # Send DM to the AFK user
-                dm_embed = discord.Embed(
-                    title="You Were PINGED!",
-                    description=f"You were pinged by {message.author.mention} while you were AFK.",
-                    color=discord.Color.orange()
-                )
-                dm_embed.add_field(name="Message", value=message.content, inline=False)
-                dm_embed.set_footer(text="AFK System")
-                await user.send(embed=dm_embed)
+        afk_ids = self.afk_store.mentioned(ctx.guild_id, ctx.mention_ids) if ctx.mention_ids else ()
+        if not afk_ids:
+            return
+
+        self.notices.add(ctx.channel_id, (message, afk_ids))
+        for user_id in afk_ids:
+            # Record the ping
+            self.afk_store.add_ping(user_id, ctx.author_id, ctx.channel_id, message.content)
+            self.digests.add(user_id, message)
+
+    async def send_notice(self, channel_id, items):
+        channel = items[0][0].channel
+        messages = list({message.id: message for message, _ in items}.values())
+        afk_ids = set().union(*(ids for _, ids in items))
+
+        # Delete the messages, up to 100 per request
+        try:
+            if hasattr(channel, 'delete_messages'):
+                for i in range(0, len(messages), 100):
+                    await channel.delete_messages(messages[i:i + 100])
+            else:
+                for message in messages:
+                    await message.delete()
+        except discord.HTTPException:
+            pass
+
+        # Notify the senders
+        mentions = ", ".join(f"<@{user_id}>" for user_id in sorted(afk_ids))
+        embed = discord.Embed(
+            title="User AFK",
+            description=f"{mentions} {'is' if len(afk_ids) == 1 else 'are'} currently AFK. Please try again later.",
+            color=discord.Color.red()
+        )
+        embed.set_footer(text="AFK System")
+        await channel.send(embed=embed)
+
+    async def send_digest(self, user_id, digest):
+        if user_id not in self.afk_store.users:
+            # They came back and already got the summary.
+            return
+        user = self.bot.get_user(user_id)
+        if user is None:
+            return
+
+        dm_embed = discord.Embed(
+            title="You Were PINGED!",
+            description=f"You were pinged {digest.count} time{'s' if digest.count != 1 else ''} while you were AFK.",
+            color=discord.Color.orange()
+        )
+        for author, channel, text in digest.recent:
+            dm_embed.add_field(name=f"{author} in #{channel}", value=text, inline=False)
+        hidden = digest.count - len(digest.recent)
+        if hidden:
+            dm_embed.set_footer(text=f"AFK System - {hidden} earlier pings not shown")
+        else:
+            dm_embed.set_footer(text="AFK System")
+        try:
+            await user.send(embed=dm_embed)
+        except discord.Forbidden:
+            pass
 
 async def setup(bot) -> None:
     await bot.add_cog(AFKCog(bot))
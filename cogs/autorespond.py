@@ -1,98 +1,222 @@
+import asyncio
+import os
+from collections import OrderedDict
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+from utils.triggers import TriggerIndex
+
+class GuildTable:
+    __slots__ = ("store", "index")
+
+    def __init__(self, store):
+        self.store = store
+        self.index = TriggerIndex()
+        for trigger, entry in self.triggers.items():
+            response, mode = AutoRespond.unpack(entry)
+            try:
+                self.index.add(trigger, response, mode)
+            except ValueError:
+                # Saved before empty triggers were rejected; it could never match sensibly.
+                continue
+
+    @property
+    def triggers(self):
+        return self.store.data["triggers"]
+
+    @property
+    def enabled(self):
+        return self.store.data.get("enabled", True)
 
 class AutoRespond(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config_path = os.path.join("database", "automessage.json")
-        self.load_config()
-        self.enabled = True
+        # The old process-wide trigger file seeds the guilds the bot is in
+        # at its first start with per-guild tables; see retire_legacy.
+        self.legacy_store = bot.storage.open("automessage.json")
+        self.legacy = self.legacy_store.data
+        self.max_tables = bot.cfg.get("autorespond_cache_size", 500)
+        self.tables = OrderedDict()
+        self.loading = {}
+
+    @staticmethod
+    def unpack(entry):
+        # Plain strings are exact-match triggers from before match modes existed.
+        if isinstance(entry, str):
+            return entry, "exact"
+        return entry["response"], entry.get("mode", "exact")
+
+    async def get_table(self, guild_id: int) -> GuildTable:
+        table = self.tables.get(guild_id)
+        if table is not None:
+            self.tables.move_to_end(guild_id)
+            return table
+        task = self.loading.get(guild_id)
+        if task is None:
+            task = self.loading[guild_id] = asyncio.create_task(self.load_table(guild_id))
+        return await asyncio.shield(task)
+
+    async def load_table(self, guild_id: int) -> GuildTable:
+        try:
+            store = await self.bot.storage.load(
+                f"autorespond/{guild_id}.json",
+                {"enabled": True, "triggers": self.legacy}
+            )
+            table = self.tables[guild_id] = GuildTable(store)
+            while len(self.tables) > self.max_tables:
+                _, evicted = self.tables.popitem(last=False)
+                self.bot.storage.release(evicted.store.name)
+            return table
+        finally:
+            del self.loading[guild_id]
+
+    async def cog_load(self):
+        self.bot.pipeline.register("autorespond", self.handle_message, self.wants_message)
+        if self.bot.is_ready():
+            asyncio.create_task(self.retire_legacy())
 
-    def load_config(self):
-        if not os.path.exists(self.config_path):
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w') as f:
-                json.dump({}, f)
-        with open(self.config_path, 'r') as f:
-            self.config = json.load(f)
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.retire_legacy()
+
+    async def retire_legacy(self):
+        """
+        Write a table seeded from the legacy file for every current guild,
+        then move the file aside so guilds joined later start empty.
+        """
+        seed = self.legacy
+        if not seed:
+            return
+        self.legacy = {}
+        failed = 0
+        for guild in list(self.bot.guilds):
+            store = await self.bot.storage.load(
+                f"autorespond/{guild.id}.json",
+                {"enabled": True, "triggers": seed}
+            )
+            store.mark_dirty()
+            await store.flush()
+            failed += store.pending > 0
+            if guild.id not in self.tables:
+                self.bot.storage.release(store.name)
+        if failed:
+            # Keep the file so the next start can seed the guilds that failed.
+            self.bot.logger.warning(f"Could not write {failed} auto-respond tables; keeping the legacy trigger file")
+            return
+        self.bot.storage.release(self.legacy_store.name)
+        try:
+            await asyncio.to_thread(os.replace, self.legacy_store.path, f"{self.legacy_store.path}.migrated")
+        except OSError as e:
+            self.bot.logger.warning(f"Could not move {self.legacy_store.path} aside: {e}")
 
-    def save_config(self):
-        with open(self.config_path, 'w') as f:
-            json.dump(self.config, f, indent=4)
+    async def cog_unload(self):
+        self.bot.pipeline.unregister("autorespond")
+        for table in self.tables.values():
+            self.bot.storage.release(table.store.name)
+        self.tables.clear()
 
-    autorespond_group = app_commands.Group(name="autorespond", description="Manage auto-respond messages")
+    autorespond_group = app_commands.Group(name="autorespond", description="Manage auto-respond messages", guild_only=True)
 
     @autorespond_group.command(name="set", description="Set an auto-respond message")
-    @app_commands.describe(trigger="The message to respond to", response="The message to reply with")
-    async def autorespond_set(self, interaction: discord.Interaction, trigger: str, response: str):
+    @app_commands.describe(
+        trigger="The message to respond to",
+        response="The message to reply with",
+        mode="How the trigger is matched (default: whole message)"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Whole message", value="exact"),
+        app_commands.Choice(name="Anywhere in the message", value="contains"),
+        app_commands.Choice(name="As a whole word", value="word"),
+        app_commands.Choice(name="Wildcard pattern (*)", value="wildcard")
+    ])
+    async def autorespond_set(self, interaction: discord.Interaction, trigger: str, response: str, mode: str = "exact"):
+        table = await self.get_table(interaction.guild_id)
         trigger_lower = trigger.lower()
-        self.config[trigger_lower] = response
-        self.save_config()
+        try:
+            table.index.add(trigger_lower, response, mode)
+        except ValueError as e:
+            await interaction.response.send_message(f"{e}.", ephemeral=True)
+            return
+        table.triggers[trigger_lower] = response if mode == "exact" else {"response": response, "mode": mode}
+        table.store.mark_dirty()
 
         embed = discord.Embed(title="Auto-Respond Set", color=discord.Color.green())
         embed.add_field(name="Trigger", value=f'`{trigger}`', inline=False)
         embed.add_field(name="Response", value=response, inline=False)
+        embed.add_field(name="Mode", value=mode, inline=False)
 
         await interaction.response.send_message(embed=embed)
 
     @autorespond_group.command(name="show", description="Show all auto-respond messages")
     async def autorespond_show(self, interaction: discord.Interaction):
-        if not self.config:
+        table = await self.get_table(interaction.guild_id)
+        if not table.triggers:
             embed = discord.Embed(title="Auto-Respond Messages", description="No auto-respond messages set.", color=discord.Color.red())
             await interaction.response.send_message(embed=embed)
             return
 
         embed = discord.Embed(title="Auto-Respond Messages", color=discord.Color.blue())
-        for trigger, response in self.config.items():
-            embed.add_field(name=trigger, value=response, inline=False)
+        for trigger, entry in table.triggers.items():
+            response, mode = self.unpack(entry)
+            name = trigger if mode == "exact" else f"{trigger} ({mode})"
+            embed.add_field(name=name, value=response, inline=False)
         await interaction.response.send_message(embed=embed)
 
     @autorespond_group.command(name="remove", description="Remove an auto-respond message")
     @app_commands.describe(trigger="The message to remove")
     async def autorespond_remove(self, interaction: discord.Interaction, trigger: str):
+        table = await self.get_table(interaction.guild_id)
         trigger_lower = trigger.lower()
-        if trigger_lower not in self.config:
+        if trigger_lower not in table.triggers:
             embed = discord.Embed(title="Error", description="That auto-respond message does not exist.", color=discord.Color.red())
             await interaction.response.send_message(embed=embed)
             return
-        del self.config[trigger_lower]
-        self.save_config()
+        del table.triggers[trigger_lower]
+        table.index.remove(trigger_lower)
+        table.store.mark_dirty()
         embed = discord.Embed(title="Auto-Respond Removed", description=f"Auto-respond message '{trigger}' removed.", color=discord.Color.green())
         await interaction.response.send_message(embed=embed)
 
     @autorespond_group.command(name="disable", description="Disable auto-respond messages")
     async def autorespond_disable(self, interaction: discord.Interaction):
-        if not self.enabled:
+        table = await self.get_table(interaction.guild_id)
+        if not table.enabled:
             embed = discord.Embed(title="Error", description="Auto-respond messages are already disabled.", color=discord.Color.red())
             await interaction.response.send_message(embed=embed)
             return
 
-        self.enabled = False
+        table.store.data["enabled"] = False
+        table.store.mark_dirty()
         embed = discord.Embed(title="Auto-Respond Disabled", description="Auto-respond messages disabled.", color=discord.Color.orange())
         await interaction.response.send_message(embed=embed)
 
     @autorespond_group.command(name="enable", description="Enable auto-respond messages")
     async def autorespond_enable(self, interaction: discord.Interaction):
-        if self.enabled:
+        table = await self.get_table(interaction.guild_id)
+        if table.enabled:
             embed = discord.Embed(title="Info", description="Auto-respond messages are already enabled. To disable, use /autorespond disable.", color=discord.Color.orange())
             await interaction.response.send_message(embed=embed)
             return
 
-        self.enabled = True
+        table.store.data["enabled"] = True
+        table.store.mark_dirty()
         embed = discord.Embed(title="Auto-Respond Enabled", description="Auto-respond messages enabled.", color=discord.Color.green())
         await interaction.response.send_message(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author == self.bot.user:
-            return
-        if not self.enabled:
+    def wants_message(self, ctx):
+        if ctx.guild_id is None:
+            return False
+        table = self.tables.get(ctx.guild_id)
+        # Unloaded guilds need one pass to load their table.
+        return table is None or (table.enabled and len(table.index) > 0)
+
+    async def handle_message(self, ctx):
+        message = ctx.message
+        table = await self.get_table(ctx.guild_id)
+        if not table.enabled:
             return
 
-        response = self.config.get(message.content.lower())
+        response = table.index.match(ctx.content_lower)
         if response:
             embed = discord.Embed(
                 description=response,
@@ -101,4 +225,4 @@ class AutoRespond(commands.Cog):
             await message.channel.send(embed=embed)
 
 async def setup(bot) -> None:
-    await bot.add_cog(AutoRespond(bot))
\ No newline at end of file
+    await bot.add_cog(AutoRespond(bot))
@@ -1,17 +1,118 @@
 import discord
 from discord.ext import commands
 from discord.ui import Select, View, Button, Modal, TextInput
-import json
-import os
 import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from discord import app_commands
+from utils.cache import TTLCache
+from utils.templates import CompiledTemplate
+
+SHARED_TEMPLATES = 0
+
+def parse_color(value, default=discord.Color.blue().value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.lstrip('#').removeprefix('0x'), 16)
+        except ValueError:
+            pass
+    return default
+
+def build_embed(embed_data, placeholders=True):
+    embed = discord.Embed(
+        title=embed_data.get('Title', 'Title' if placeholders else ''),
+        description=embed_data.get('Description', 'Description' if placeholders else ''),
+        color=parse_color(embed_data.get('Color'))
+    )
+
+    thumbnail_url = embed_data.get('Thumbnail URL')
+    if thumbnail_url:
+        embed.set_thumbnail(url=thumbnail_url)
+
+    author_text = embed_data.get('Author Text')
+    author_icon_url = embed_data.get('Author Icon URL')
+    if author_text:
+        embed.set_author(name=author_text, icon_url=author_icon_url)
+
+    footer_icon_url = embed_data.get('Footer Icon URL')
+    if footer_icon_url:
+        embed.set_footer(icon_url=footer_icon_url)
+
+    fields = embed_data.get('Fields', [])
+    for field in fields:
+        embed.add_field(name=field['name'], value=field['value'], inline=field['inline'])
+
+    image_url = embed_data.get('Image')
+    if image_url:
+        embed.set_image(url=image_url)
+
+    return embed
+
+class DraftSessions:
+    """
+    Embed drafts keyed by (guild id, user id), kept in memory only.
+
+    Sessions expire ``ttl`` seconds after their last use; entries are kept
+    in last-used order so expired ones are dropped from the front in O(1)
+    on each access.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.sessions = OrderedDict()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self.sessions:
+            key, (touched, _) = next(iter(self.sessions.items()))
+            if touched > cutoff:
+                break
+            del self.sessions[key]
+
+    def get(self, key):
+        self._expire()
+        entry = self.sessions.get(key)
+        if entry is None:
+            return None
+        self.sessions[key] = (time.monotonic(), entry[1])
+        self.sessions.move_to_end(key)
+        return entry[1]
+
+    def start(self, key, data=None):
+        self._expire()
+        self.sessions[key] = (time.monotonic(), deepcopy(data or {}))
+        self.sessions.move_to_end(key)
+        return self.sessions[key][1]
+
+    def end(self, key):
+        self.sessions.pop(key, None)
+
+    def __len__(self):
+        return len(self.sessions)
+
+async def get_draft(parent_cog, key, interaction):
+    """Return the draft for a session, telling the user if it expired or isn't theirs."""
+    if interaction.user.id != key[1]:
+        await interaction.response.send_message("This embed editor belongs to someone else. Use /embed to start your own.", ephemeral=True)
+        return None
+    draft = parent_cog.drafts.get(key)
+    if draft is None:
+        await interaction.response.send_message("This embed draft has expired. Use /embed to start again.", ephemeral=True)
+    return draft
 
 class EmbedSetupModal(Modal):
-    def __init__(self, field_type, parent_cog, preview_message):
+    def __init__(self, field_type, parent_cog, preview_message, key):
         super().__init__(title=f'Set {field_type}')
         self.field_type = field_type
         self.parent_cog = parent_cog
         self.preview_message = preview_message
-        
+        self.key = key
+
         if field_type == "Color":
             self.add_item(TextInput(label='Enter color code (e.g., #FF0000)', style=discord.TextStyle.short))
         elif field_type in ["Author Text", "Author Icon URL", "Footer Icon URL", "Image", "Thumbnail URL"]:
@@ -27,20 +128,10 @@ class EmbedSetupModal(Modal):
         if self.field_type in ["Add Field", "Add Inline Field"]:
             field_name = self.children[0].value
             field_value = self.children[1].value
-        
-        config_path = os.path.join('database', 'embed.json')
 
-        if not os.path.exists('database'):
-            os.makedirs('database')
-
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    embed_data = json.load(f)
-            else:
-                embed_data = {}
-        except json.JSONDecodeError:
-            embed_data = {}
+        embed_data = await get_draft(self.parent_cog, self.key, interaction)
+        if embed_data is None:
+            return
 
         if self.field_type in ["Add Field", "Add Inline Field"]:
             fields = embed_data.get('Fields', [])
@@ -48,154 +139,56 @@ class EmbedSetupModal(Modal):
             fields.append(field)
             embed_data['Fields'] = fields
         elif self.field_type == "Color":
-            # Ensure the color value is a valid hexadecimal string
-            if not field_value.startswith("#"):
-                field_value = "#" + field_value
-            embed_data['Color'] = int(field_value.lstrip('#'), 16)
+            color = parse_color(field_value, None)
+            if color is None:
+                await interaction.response.send_message("Invalid color code. Use a hex value like #FF0000.", ephemeral=True)
+                return
+            embed_data['Color'] = color
         else:
             embed_data[self.field_type] = field_value
 
-        with open(config_path, 'w') as f:
-            json.dump(embed_data, f, indent=4)
-
-        await self.update_preview()
         await interaction.response.send_message(f"{self.field_type} saved!", ephemeral=True)
+        await self.update_preview(embed_data)
 
-    async def update_preview(self):
-        config_path = os.path.join('database', 'embed.json')
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    embed_data = json.load(f)
-            else:
-                embed_data = {}
-        except json.JSONDecodeError:
-            embed_data = {}
-
-        embed = discord.Embed(
-            title=embed_data.get('Title', 'Title'),
-            description=embed_data.get('Description', 'Description'),
-            color=embed_data.get('Color', discord.Color.blue().value)  # Default to blue if no color is set
-        )
-
-        thumbnail_url = embed_data.get('Thumbnail URL')
-        if thumbnail_url:
-            print(f"Setting thumbnail: {thumbnail_url}")  # Debug line
-            embed.set_thumbnail(url=thumbnail_url)
-
-        author_text = embed_data.get('Author Text')
-        author_icon_url = embed_data.get('Author Icon URL')
-        if author_text:
-            embed.set_author(name=author_text, icon_url=author_icon_url)
-
-        footer_icon_url = embed_data.get('Footer Icon URL')
-        if footer_icon_url:
-            embed.set_footer(icon_url=footer_icon_url)
-
-        fields = embed_data.get('Fields', [])
-        for field in fields:
-            embed.add_field(name=field['name'], value=field['value'], inline=field['inline'])
-
-        image_url = embed_data.get('Image')
-        if image_url:
-            embed.set_image(url=image_url)
-
-        await self.preview_message.edit(embed=embed)
+    async def update_preview(self, embed_data):
+        self.parent_cog.bot.previews.schedule(self.preview_message, build_embed(embed_data))
 
 class EmbedActionDropdown(Select):
-    def __init__(self, field_name, parent_cog, preview_message):
+    def __init__(self, field_name, parent_cog, preview_message, key):
         self.field_name = field_name
         self.parent_cog = parent_cog
         self.preview_message = preview_message
+        self.key = key
         options = [
-            discord.SelectOption(label='Edit', description=f'Edit {field_name}'), 
+            discord.SelectOption(label='Edit', description=f'Edit {field_name}'),
             discord.SelectOption(label='Reset', description=f'Reset {field_name}')
         ]
         super().__init__(placeholder=f'Actions for {field_name}', min_values=1, max_values=1, options=options)
 
     async def callback(self, interaction: discord.Interaction):
         if self.values[0] == 'Edit':
-            modal = EmbedSetupModal(self.field_name, self.parent_cog, self.preview_message)
+            modal = EmbedSetupModal(self.field_name, self.parent_cog, self.preview_message, self.key)
             await interaction.response.send_modal(modal)
-        elif self.values[0] == 'Cancel':
-            # Remove the dropdown and send a cancellation message
-            await interaction.response.send_message(f'Editing of {self.field_name} has been canceled.', ephemeral=True)
-            
-            # Create a new view without the dropdown
-            view = View()
-            
-            # Recreate and add other components (if needed)
-            # e.g., view.add_item(EmbedDropdown(self.parent_cog, self.preview_message))
-            view.add_item(EmbedSendButton(self.parent_cog, self.preview_message))
-             
-            await self.preview_message.edit(view=view)
-        elif self.values[0] == 'Delete':
-            config_path = os.path.join('database', 'embed.json')
-            try:
-                if os.path.exists(config_path):
-                    with open(config_path, 'r') as f:
-                        embed_data = json.load(f)
-                else:
-                    embed_data = {}
-            except json.JSONDecodeError:
-                embed_data = {}
-
-            if 'Fields' in embed_data:
-                fields = embed_data['Fields']
-                fields = [field for field in fields if field['name'] != self.field_name]
-                embed_data['Fields'] = fields
-                with open(config_path, 'w') as f:
-                    json.dump(embed_data, f, indent=4)
-                await self.update_preview()
-                await interaction.response.send_message(f'{self.field_name} has been deleted from the embed.', ephemeral=True)
-            else:
-                await interaction.response.send_message(f'{self.field_name} not found in the embed.', ephemeral=True)
-
-    async def update_preview(self):
-        config_path = os.path.join('database', 'embed.json')
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    embed_data = json.load(f)
+        elif self.values[0] == 'Reset':
+            embed_data = await get_draft(self.parent_cog, self.key, interaction)
+            if embed_data is None:
+                return
+            if self.field_name in ["Add Field", "Add Inline Field"]:
+                inline = self.field_name == "Add Inline Field"
+                embed_data['Fields'] = [field for field in embed_data.get('Fields', []) if field['inline'] != inline]
             else:
-                embed_data = {}
-        except json.JSONDecodeError:
-            embed_data = {}
-
-        embed = discord.Embed(
-            title=embed_data.get('Title', 'Title'),
-            description=embed_data.get('Description', 'Description'),
-            color=int(embed_data.get('Color', '0x0000FF'), 16) 
-        )
-
-        thumbnail_url = embed_data.get('Thumbnail URL')
-        if thumbnail_url:
-            print(f"Setting thumbnail: {thumbnail_url}")  # Debug line
-            embed.set_thumbnail(url=thumbnail_url)
-
-        author_text = embed_data.get('Author Text')
-        author_icon_url = embed_data.get('Author Icon URL')
-        if author_text:
-            embed.set_author(name=author_text, icon_url=author_icon_url)
-
-        footer_icon_url = embed_data.get('Footer Icon URL')
-        if footer_icon_url:
-            embed.set_footer(icon_url=footer_icon_url)
-
-        fields = embed_data.get('Fields', [])
-        for field in fields:
-            embed.add_field(name=field['name'], value=field['value'], inline=field['inline'])
-
-        image_url = embed_data.get('Image')
-        if image_url:
-            embed.set_image(url=image_url)
+                embed_data.pop(self.field_name, None)
+            await interaction.response.send_message(f'{self.field_name} has been reset.', ephemeral=True)
+            await self.update_preview(embed_data)
 
-        await self.preview_message.edit(embed=embed)
+    async def update_preview(self, embed_data):
+        self.parent_cog.bot.previews.schedule(self.preview_message, build_embed(embed_data))
 
 class EmbedDropdown(Select):
-    def __init__(self, parent_cog, preview_message):
+    def __init__(self, parent_cog, preview_message, key):
         self.parent_cog = parent_cog
         self.preview_message = preview_message
+        self.key = key
         options = [
             discord.SelectOption(label='Title', description='Set the title of the embed'),
             discord.SelectOption(label='Description', description='Set the description of the embed'),
@@ -212,65 +205,47 @@ class EmbedDropdown(Select):
         super().__init__(placeholder='Edit embed', min_values=1, max_values=1, options=options)
 
     async def callback(self, interaction: discord.Interaction):
+        embed_data = await get_draft(self.parent_cog, self.key, interaction)
+        if embed_data is None:
+            return
         if self.values[0] == 'Reset':
-            self.parent_cog.reset_embed_config()
-            await self.update_preview()
+            embed_data.clear()
             await interaction.response.send_message("Embed settings have been reset.", ephemeral=True)
+            await self.update_preview(embed_data)
         else:
             field_name = self.values[0]
-            action_dropdown = EmbedActionDropdown(field_name, self.parent_cog, self.preview_message)
+            action_dropdown = EmbedActionDropdown(field_name, self.parent_cog, self.preview_message, self.key)
             view = View()
             view.add_item(action_dropdown)
             await interaction.response.send_message(f"What action should be done to {field_name}?", view=view, ephemeral=True)
 
-    async def update_preview(self):
-        config_path = os.path.join('database', 'embed.json')
-        try:
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    embed_data = json.load(f)
-            else:
-                embed_data = {}
-        except json.JSONDecodeError:
-            embed_data = {}
-
-        embed = discord.Embed(
-            title=embed_data.get('Title', 'Title'),
-            description=embed_data.get('Description', 'Description'),
-            color=int(embed_data.get('Color', '0x0000FF'), 16) 
-        )
-
-        thumbnail_url = embed_data.get('Thumbnail URL')
-        if thumbnail_url:
-            print(f"Setting thumbnail: {thumbnail_url}")  # Debug line
-            embed.set_thumbnail(url=thumbnail_url)
-
-        author_text = embed_data.get('Author Text')
-        author_icon_url = embed_data.get('Author Icon URL')
-        if author_text:
-            embed.set_author(name=author_text, icon_url=author_icon_url)
-
-        footer_icon_url = embed_data.get('Footer Icon URL')
-        if footer_icon_url:
-            embed.set_footer(icon_url=footer_icon_url)
-
-        fields = embed_data.get('Fields', [])
-        for field in fields:
-            embed.add_field(name=field['name'], value=field['value'], inline=field['inline'])
+    async def update_preview(self, embed_data):
+        self.parent_cog.bot.previews.schedule(self.preview_message, build_embed(embed_data))
 
-        image_url = embed_data.get('Image')
-        if image_url:
-            embed.set_image(url=image_url)
+class EmbedSaveButton(Button):
+    def __init__(self, parent_cog, key):
+        super().__init__(label="Save Draft", style=discord.ButtonStyle.secondary)
+        self.parent_cog = parent_cog
+        self.key = key
 
-        await self.preview_message.edit(embed=embed)
+    async def callback(self, interaction: discord.Interaction):
+        embed_data = await get_draft(self.parent_cog, self.key, interaction)
+        if embed_data is None:
+            return
+        self.parent_cog.save_draft(self.key, embed_data)
+        await interaction.response.send_message("Draft saved. Run /embed again later to pick up where you left off.", ephemeral=True)
 
 class EmbedSendButton(Button):
-    def __init__(self, parent_cog, preview_message):
+    def __init__(self, parent_cog, preview_message, key):
         super().__init__(label="Finish", style=discord.ButtonStyle.success)
         self.parent_cog = parent_cog
         self.preview_message = preview_message
+        self.key = key
 
     async def callback(self, interaction: discord.Interaction):
+        embed_data = await get_draft(self.parent_cog, self.key, interaction)
+        if embed_data is None:
+            return
         await interaction.response.send_message("Please mention the channel you want to send the embed to.", ephemeral=True)
 
         def check(msg):
@@ -279,57 +254,34 @@ class EmbedSendButton(Button):
         try:
             msg = await interaction.client.wait_for("message", check=check, timeout=30)
             channel = msg.channel_mentions[0]
-            config_path = os.path.join('database', 'embed.json')
-
-            try:
-                if os.path.exists(config_path):
-                    with open(config_path, 'r') as f:
-                        embed_data = json.load(f)
-                else:
-                    embed_data = {}
-            except json.JSONDecodeError:
-                embed_data = {}
-
-            embed = discord.Embed(
-                title=embed_data.get('Title', ''),
-                description=embed_data.get('Description', ''),
-            )
-
-            thumbnail_url = embed_data.get('Thumbnail URL', '')
-            if thumbnail_url:
-                print(f"Setting thumbnail: {thumbnail_url}")  # Debug line
-                embed.set_thumbnail(url=thumbnail_url)
-
-            author_text = embed_data.get('Author Text')
-            author_icon_url = embed_data.get('Author Icon URL')
-            if author_text:
-                embed.set_author(name=author_text, icon_url=author_icon_url)
-
-            footer_icon_url = embed_data.get('Footer Icon URL')
-            if footer_icon_url:
-                embed.set_footer(icon_url=footer_icon_url)
 
-            fields = embed_data.get('Fields', [])
-            for field in fields:
-                embed.add_field(name=field['name'], value=field['value'], inline=field['inline'])
-
-            image_url = embed_data.get('Image', '')
-            if image_url:
-                embed.set_image(url=image_url)
-
-            await channel.send(embed=embed)
+            await channel.send(embed=build_embed(embed_data, placeholders=False))
             await interaction.followup.send(f"Embed sent to {channel.mention}", ephemeral=True)
-            self.parent_cog.reset_embed_config()  # Reset the config file after sending the embed
+            self.parent_cog.end_draft(self.key)  # Drop the draft after sending the embed
         except asyncio.TimeoutError:
             await interaction.followup.send("Timed out waiting for a channel mention.", ephemeral=True)
 
 class AdvancedCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.store = bot.storage.open('embed.json')
+        # Saved drafts are keyed "guild:user"; drop the old single shared draft.
+        for legacy_key in [k for k in self.store.data if ':' not in k]:
+            del self.store.data[legacy_key]
+            self.store.mark_dirty()
+        self.drafts = DraftSessions(bot.cfg.get('embed_draft_ttl', 1800))
+        self.templates = TTLCache(ttl=3600, negative_ttl=60, maxsize=512)
+        self.send_limit = bot.cfg.get('embed_bulk_concurrency', 5)
 
     @commands.hybrid_command(name="embed", description="Previews and edits the embed message.")
+    @commands.guild_only()
     async def embed(self, ctx: commands.Context):
-        embed = discord.Embed(
+        key = (ctx.guild.id, ctx.author.id)
+        embed_data = self.drafts.get(key)
+        if embed_data is None:
+            embed_data = self.drafts.start(key, self.store.data.get(f"{key[0]}:{key[1]}"))
+
+        embed = build_embed(embed_data) if embed_data else discord.Embed(
             title='Title',
             description='Description',
             color=discord.Color.green()
@@ -337,14 +289,150 @@ class AdvancedCommands(commands.Cog):
 
         preview_message = await ctx.send(content="Use the dropdown to start editing!", embed=embed)
         view = View()
-        view.add_item(EmbedDropdown(self, preview_message))
-        view.add_item(EmbedSendButton(self, preview_message))
+        view.add_item(EmbedDropdown(self, preview_message, key))
+        view.add_item(EmbedSaveButton(self, key))
+        view.add_item(EmbedSendButton(self, preview_message, key))
         await preview_message.edit(embed=embed, view=view)
 
-    def reset_embed_config(self):
-        config_path = os.path.join('database', 'embed.json')
-        if os.path.exists(config_path):
-            os.remove(config_path)
+    def save_draft(self, key, embed_data):
+        self.store.data[f"{key[0]}:{key[1]}"] = deepcopy(embed_data)
+        self.store.mark_dirty()
+
+    def end_draft(self, key):
+        self.drafts.end(key)
+        if self.store.data.pop(f"{key[0]}:{key[1]}", None) is not None:
+            self.store.mark_dirty()
+
+    async def load_template(self, guild_id, name):
+        """Return the compiled template ``name`` for a guild, falling back to the shared library."""
+        async def load():
+            row = await self.bot.db.fetchone(
+                "SELECT data FROM embed_templates WHERE name = ? AND guild_id IN (?, ?) ORDER BY guild_id = ? DESC LIMIT 1",
+                (name, guild_id, SHARED_TEMPLATES, guild_id)
+            )
+            if row is None:
+                return None
+            return CompiledTemplate(name, build_embed(json.loads(row['data']), placeholders=False))
+
+        return await self.templates.get((guild_id, name), load, lambda template: template is None)
+
+    def forget_template(self, guild_id, name):
+        if guild_id == SHARED_TEMPLATES:
+            self.templates.clear()
+        else:
+            self.templates.invalidate((guild_id, name))
+
+    @staticmethod
+    def template_values(channel, user):
+        guild = channel.guild
+        return {
+            'guild': guild.name,
+            'member_count': guild.member_count,
+            'user': user.mention,
+            'channel': channel.mention
+        }
+
+    @commands.hybrid_group(name="embedtemplate", description="Save, list and send embed templates.")
+    @commands.guild_only()
+    async def embedtemplate(self, ctx: commands.Context):
+        if ctx.invoked_subcommand is None:
+            await ctx.send("Use `/embedtemplate save`, `list`, `delete` or `send`.", ephemeral=True)
+
+    @embedtemplate.command(name="save", description="Save your current /embed draft as a template.")
+    @app_commands.describe(name="Template name", shared="Make the template available in every server (bot owner only)")
+    @commands.has_permissions(manage_guild=True)
+    async def embedtemplate_save(self, ctx: commands.Context, name: str, shared: bool = False):
+        embed_data = self.drafts.get((ctx.guild.id, ctx.author.id))
+        if not embed_data:
+            await ctx.send("You have no embed draft. Build one with /embed first.", ephemeral=True)
+            return
+        if shared and not await self.bot.is_owner(ctx.author):
+            await ctx.send("Only the bot owner can save shared templates.", ephemeral=True)
+            return
+        name = name.lower()[:64]
+        guild_id = SHARED_TEMPLATES if shared else ctx.guild.id
+        await self.bot.db.execute(
+            "INSERT OR REPLACE INTO embed_templates (guild_id, name, data, created_by, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, name, json.dumps(embed_data), ctx.author.id, time.time())
+        )
+        self.forget_template(guild_id, name)
+        await ctx.send(f"Template `{name}` saved{' to the shared library' if shared else ''}.", ephemeral=True)
+
+    @embedtemplate.command(name="list", description="List the embed templates available here.")
+    async def embedtemplate_list(self, ctx: commands.Context):
+        rows = await self.bot.db.fetchall(
+            "SELECT guild_id, name FROM embed_templates WHERE guild_id IN (?, ?) ORDER BY name",
+            (ctx.guild.id, SHARED_TEMPLATES)
+        )
+        if not rows:
+            await ctx.send("No templates saved yet. Use /embedtemplate save.", ephemeral=True)
+            return
+        local = [f"`{row['name']}`" for row in rows if row['guild_id'] != SHARED_TEMPLATES]
+        shared = [f"`{row['name']}`" for row in rows if row['guild_id'] == SHARED_TEMPLATES]
+        embed = discord.Embed(title="Embed Templates", color=discord.Color.blue())
+        if local:
+            embed.add_field(name="This Server", value=", ".join(local)[:1024], inline=False)
+        if shared:
+            embed.add_field(name="Shared", value=", ".join(shared)[:1024], inline=False)
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @embedtemplate.command(name="delete", description="Delete an embed template.")
+    @app_commands.describe(name="Template name", shared="Delete from the shared library (bot owner only)")
+    @commands.has_permissions(manage_guild=True)
+    async def embedtemplate_delete(self, ctx: commands.Context, name: str, shared: bool = False):
+        if shared and not await self.bot.is_owner(ctx.author):
+            await ctx.send("Only the bot owner can delete shared templates.", ephemeral=True)
+            return
+        name = name.lower()
+        guild_id = SHARED_TEMPLATES if shared else ctx.guild.id
+        deleted = await self.bot.db.run(
+            lambda conn: conn.execute("DELETE FROM embed_templates WHERE guild_id = ? AND name = ?", (guild_id, name)).rowcount
+        )
+        self.forget_template(guild_id, name)
+        if deleted:
+            await ctx.send(f"Template `{name}` deleted.", ephemeral=True)
+        else:
+            await ctx.send(f"No template named `{name}`.", ephemeral=True)
+
+    @embedtemplate.command(name="send", description="Send a template to one or more channels.")
+    @app_commands.describe(name="Template name", channels="Channel mentions or IDs, separated by spaces")
+    @commands.has_permissions(manage_guild=True)
+    async def embedtemplate_send(self, ctx: commands.Context, name: str, *, channels: str):
+        template = await self.load_template(ctx.guild.id, name.lower())
+        if template is None:
+            await ctx.send(f"No template named `{name.lower()}`.", ephemeral=True)
+            return
+
+        # The bot owner may target channels in any server the bot is in.
+        owner = await self.bot.is_owner(ctx.author)
+        targets, unknown = [], []
+        for channel_id in dict.fromkeys(int(match) for match in re.findall(r"\d{15,20}", channels)):
+            channel = self.bot.get_channel(channel_id) if owner else ctx.guild.get_channel(channel_id)
+            if isinstance(channel, discord.abc.Messageable) and getattr(channel, 'guild', None) is not None:
+                targets.append(channel)
+            else:
+                unknown.append(channel_id)
+        if not targets:
+            await ctx.send("No valid channels given.", ephemeral=True)
+            return
+
+        await ctx.defer(ephemeral=True)
+        static = None if template.variables & {'guild', 'member_count', 'channel'} else template.render({'user': ctx.author.mention})
+        semaphore = asyncio.Semaphore(self.send_limit)
+
+        async def send(channel):
+            async with semaphore:
+                embed = static if static is not None else template.render(self.template_values(channel, ctx.author))
+                await channel.send(embed=embed)
+
+        results = await asyncio.gather(*(send(channel) for channel in targets), return_exceptions=True)
+        failed = [channel for channel, result in zip(targets, results) if isinstance(result, Exception)]
+        summary = f"Sent `{template.name}` to {len(targets) - len(failed)} of {len(targets)} channels."
+        if failed:
+            summary += "\nFailed: " + ", ".join(channel.mention for channel in failed[:20])
+        if unknown:
+            summary += f"\nSkipped {len(unknown)} unknown channel IDs."
+        await ctx.send(summary, ephemeral=True)
 
 async def setup(bot):
-    await bot.add_cog(AdvancedCommands(bot))
\ No newline at end of file
+    await bot.add_cog(AdvancedCommands(bot))
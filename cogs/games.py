@@ -1,5 +1,4 @@
 import random
-import aiohttp
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
@@ -83,8 +82,10 @@ class RockPaperScissorsView(discord.ui.View):
 
 
 class Fun(commands.Cog, name="fun"):
-    def __init__(self, bot) -> None:
+    def __init__(self, bot, http=None) -> None:
         self.bot = bot
+        self.http = http or bot.http_client
+        self.fact_url = bot.cfg.get("randomfact_url", "https://uselessfacts.jsph.pl/random.json?language=en")
 
     @commands.hybrid_command(name="randomfact", description="Get a random fact.")
     async def randomfact(self, context: Context) -> None:
@@ -93,20 +94,19 @@ class Fun(commands.Cog, name="fun"):
 
         :param context: The hybrid command context.
         """ 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://uselessfacts.jsph.pl/random.json?language=en"
-            ) as request:
-                if request.status == 200:
-                    data = await request.json()
-                    embed = discord.Embed(description=data["text"], color=0xD75BF4)
-                else:
-                    embed = discord.Embed(
-                        title="Error!",
-                        description="There is something wrong with the API, please try again later",
-                        color=0xE02B2B,
-                    )
-                await context.send(embed=embed)
+        try:
+            response = await self.http.get_json(self.fact_url)
+        except Exception:
+            response = None
+        if response is not None and response.status == 200:
+            embed = discord.Embed(description=response.data["text"], color=0xD75BF4)
+        else:
+            embed = discord.Embed(
+                title="Error!",
+                description="There is something wrong with the API, please try again later",
+                color=0xE02B2B,
+            )
+        await context.send(embed=embed)
 
     @commands.hybrid_command(
         name="coinflip", description="Make a coin flip, but give your bet before."
@@ -1,8 +1,15 @@
-import aiohttp
+import asyncio
+import random
+import re
+import time
+from collections import OrderedDict
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
+from utils import mcping
+from utils.cache import TTLCache
+from utils.timeseries import ServerHistory, sparkline
 
 
 
@@ -10,32 +17,213 @@ from discord.ext.commands import Context
 networkemoji = "<:network:1270364022268760066>"
 
 
+def normalize_address(serverip: str) -> str:
+    address = serverip.strip().lower().rstrip(".")
+    if address.endswith(":25565"):
+        address = address[:-len(":25565")]
+    return address
+
+
+# period -> (rollup, buckets, buckets merged per chart point)
+HISTORY_PERIODS = {
+    "hour": ("minute", 60, 1),
+    "day": ("hour", 24, 1),
+    "week": ("hour", 168, 4),
+    "month": ("day", 30, 1),
+    "year": ("day", 364, 7),
+}
+
+
+class TrackedServer:
+    __slots__ = ("key", "guild_id", "serverip", "message", "next_due", "fingerprint")
+
+    def __init__(self, guild_id, serverip, message, next_due, fingerprint=None):
+        self.key = f"{guild_id}:{normalize_address(serverip)}"
+        self.guild_id = guild_id
+        self.serverip = serverip
+        self.message = message
+        self.next_due = next_due
+        self.fingerprint = fingerprint
+
+    def pack(self):
+        return [self.guild_id, self.message.channel.id, self.message.id, self.serverip]
+
+
 class Minecraft(commands.Cog, name="minecraft"):
-    def __init__(self, bot) -> None:
+    def __init__(self, bot, http=None) -> None:
         self.bot = bot
+        self.http = http or bot.http_client
+        self.status_url = bot.cfg.get("mc_status_url", "https://api.mcsrvstat.us/2")
+        self.favicon_url = bot.cfg.get("mc_favicon_url", "https://eu.mc-api.net/v3/server/favicon")
+        self.native_ping = bot.cfg.get("mc_native_ping", True)
+        self.ping_timeout = bot.cfg.get("mc_ping_timeout", 3.0)
         self.default_icon_url = "https://images-ext-1.discordapp.net/external/QQYQnSuVr1s60UMShOup4RIiQ-F58ruQh713FpJ--Zk/https/www.tripwire.com/sites/default/files/2023-06/minecraft.jpg?format=webp&width=771&height=441"
-        self.server_data_cache = {}
+        self.tracked = {}
+        self.subscriptions = bot.storage.open("mc_livestatus.json", indent=None)
+        # Player history is kept only for addresses with a live board.
+        self.histories = OrderedDict()
+        self.sampled_at = {}
+        self.max_histories = bot.cfg.get("mc_history_cache_size", 256)
+        self.refresh_interval = bot.cfg.get("mc_refresh_interval", 600)
+        self.refresh_jitter = bot.cfg.get("mc_refresh_jitter", 0.1)
+        self.refresh_limit = asyncio.Semaphore(bot.cfg.get("mc_refresh_concurrency", 8))
+        self.status_cache = TTLCache(
+            bot.cfg.get("mc_status_ttl", 60),
+            negative_ttl=bot.cfg.get("mc_status_negative_ttl", 30)
+        )
+        self.icon_cache = TTLCache(
+            bot.cfg.get("mc_icon_ttl", 3600),
+            negative_ttl=bot.cfg.get("mc_icon_negative_ttl", 300)
+        )
+        self.restore_subscriptions()
         self.mcstats_task.start()
 
+    def restore_subscriptions(self) -> None:
+        # Boards come back as partial messages, spread over one refresh
+        # interval so a restart doesn't poll every server at once.
+        now = time.monotonic()
+        for guild_id, channel_id, message_id, serverip in self.subscriptions.data.values():
+            channel = self.bot.get_partial_messageable(channel_id, guild_id=guild_id or None)
+            server = TrackedServer(
+                guild_id,
+                serverip,
+                channel.get_partial_message(message_id),
+                now + random.uniform(0, self.refresh_interval)
+            )
+            self.tracked[server.key] = server
+
+    def track(self, server: TrackedServer) -> None:
+        self.tracked[server.key] = server
+        self.subscriptions.data[server.key] = server.pack()
+        self.subscriptions.mark_dirty()
+
+    def untrack(self, server: TrackedServer) -> None:
+        if self.tracked.get(server.key) is server:
+            del self.tracked[server.key]
+            self.subscriptions.data.pop(server.key, None)
+            self.subscriptions.mark_dirty()
+            address = normalize_address(server.serverip)
+            if not self.is_tracked(address):
+                self.drop_history(address)
+
+    def is_tracked(self, address: str) -> bool:
+        return any(normalize_address(server.serverip) == address for server in self.tracked.values())
+
+    def drop_history(self, address: str) -> None:
+        entry = self.histories.pop(address, None)
+        self.sampled_at.pop(address, None)
+        if entry is not None:
+            self.bot.storage.release(entry[1].name)
+
+    async def get_history(self, serverip: str):
+        address = normalize_address(serverip)
+        entry = self.histories.get(address)
+        if entry is not None:
+            self.histories.move_to_end(address)
+            return entry
+        filename = re.sub(r"[^a-z0-9.-]", "_", address)
+        store = await self.bot.storage.load(f"mc_history/{filename}.json", indent=None)
+        entry = self.histories.get(address)
+        if entry is None:
+            history = ServerHistory()
+            history.unpack(store.data)
+            entry = self.histories[address] = (history, store)
+            while len(self.histories) > self.max_histories:
+                self.drop_history(next(iter(self.histories)))
+        return entry
+
+    async def record_sample(self, serverip: str, data: dict) -> None:
+        # Several boards can show the same address; sample it once per refresh.
+        address = normalize_address(serverip)
+        now = time.monotonic()
+        if now - self.sampled_at.get(address, float("-inf")) < self.refresh_interval / 2:
+            return
+        history, store = await self.get_history(address)
+        self.sampled_at[address] = now
+        history.add(time.time(), data["players"]["online"], data["players"]["max"])
+        store.data = history.pack()
+        store.mark_dirty()
+
+    def cog_unload(self):
+        self.mcstats_task.cancel()
+
+    def next_due(self) -> float:
+        spread = self.refresh_interval * self.refresh_jitter
+        return time.monotonic() + self.refresh_interval + random.uniform(-spread, spread)
+
+    @staticmethod
+    def fingerprint(data: dict, icon_url: str) -> tuple:
+        players = data["players"]
+        return (
+            players["online"],
+            players["max"],
+            data["version"],
+            tuple(players.get("list", ())),
+            tuple(data.get("motd", {}).get("clean", ())),
+            icon_url
+        )
+
     async def fetch_server_data(self, serverip: str) -> dict:
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(f"https://api.mcsrvstat.us/2/{serverip}") as response:
-                    if response.status == 200:
-                        return await response.json()
-                    return {"error": f"HTTP error {response.status}"}
-            except Exception as e:
-                return {"error": str(e)}
+        address = normalize_address(serverip)
+        return await self.status_cache.get(
+            address,
+            lambda: self.request_server_data(address),
+            is_negative=lambda data: "error" in data or not data.get("online")
+        )
 
     async def fetch_icon_url(self, serverip: str) -> str:
-        async with aiohttp.ClientSession() as session:
+        address = normalize_address(serverip)
+        return await self.icon_cache.get(
+            address,
+            lambda: self.request_icon_url(address),
+            is_negative=lambda url: url is None
+        )
+
+    async def request_server_data(self, serverip: str) -> dict:
+        if self.native_ping:
             try:
-                async with session.get(f"https://eu.mc-api.net/v3/server/favicon/{serverip}") as response:
-                    if response.status == 200:
-                        return f"https://eu.mc-api.net/v3/server/favicon/{serverip}"
-                    return None
-            except Exception:
-                return None
+                return await mcping.status(serverip, timeout=self.ping_timeout)
+            except (OSError, EOFError, ValueError, asyncio.TimeoutError):
+                pass
+        try:
+            response = await self.http.get_json(f"{self.status_url}/{serverip}")
+        except Exception as e:
+            return {"error": str(e) or type(e).__name__}
+        if response.status == 200:
+            return response.data
+        return {"error": f"HTTP error {response.status}"}
+
+    async def request_icon_url(self, serverip: str) -> str:
+        url = f"{self.favicon_url}/{serverip}"
+        try:
+            response = await self.http.get(url)
+        except Exception:
+            return None
+        if response.status == 200:
+            return url
+        return None
+
+    def status_embed(self, serverip: str, data: dict, icon_url: str, title: str, footer: str) -> discord.Embed:
+        embed = discord.Embed(
+            title=title,
+            color=discord.Color.dark_embed()
+        )
+        embed.add_field(name="Server IP", value=f"__**{serverip}**__", inline=False)
+        embed.add_field(name=f"{networkemoji} Online Players", value=data["players"]["online"], inline=True)
+        embed.add_field(name="Max Players", value=data["players"]["max"], inline=True)
+        embed.add_field(name="Version", value=data["version"], inline=True)
+
+        if "list" in data["players"]:
+            player_names = ", ".join(data["players"]["list"])
+            embed.add_field(name="Players", value=player_names, inline=False)
+
+        if "motd" in data:
+            motd = "\n".join(data["motd"]["clean"])
+            embed.add_field(name="Description", value=motd, inline=False)
+
+        embed.set_thumbnail(url=icon_url)
+        embed.set_footer(text=footer)
+        return embed
 
     @commands.hybrid_command(
         name="livestatus",
@@ -55,36 +243,20 @@ class Minecraft(commands.Cog, name="minecraft"):
 
         icon_url = await self.fetch_icon_url(serverip) or self.default_icon_url
 
-        embed = discord.Embed(
-            title=f" ",
-            color=discord.Color.dark_embed()
-        )
-        emoji = "<:general:1263092233079361607>"
-        emoji2 = "<:network:1270364022268760066>"
-        embed.add_field(name="Server IP", value=f"__**{serverip}**__", inline=False)
-        embed.add_field(name=f"{emoji2} Online Players", value=data["players"]["online"], inline=True)
-        embed.add_field(name="Max Players", value=data["players"]["max"], inline=True)
-        embed.add_field(name="Version", value=data["version"], inline=True)
-
-        if "list" in data["players"]:
-            player_names = ", ".join(data["players"]["list"])
-            embed.add_field(name="Players", value=player_names, inline=False)
+        embed = self.status_embed(serverip, data, icon_url, " ", "Updates every 10 minutes")
 
-        if "motd" in data:
-            motd = "\n".join(data["motd"]["clean"])
-            embed.add_field(name="Description", value=motd, inline=False)
-
-        embed.set_thumbnail(url=icon_url)
-        embed.set_footer(text="Updates every 10 minutes")
-
-        if serverip in self.server_data_cache:
+        guild_id = context.guild.id if context.guild else 0
+        previous = self.tracked.get(f"{guild_id}:{normalize_address(serverip)}")
+        if previous is not None:
+            self.untrack(previous)
             try:
-                await self.server_data_cache[serverip].delete()
+                await previous.message.delete()
             except discord.NotFound:
                 pass
 
         message = await context.send(embed=embed)
-        self.server_data_cache[serverip] = message
+        self.track(TrackedServer(guild_id, serverip, message, self.next_due(), self.fingerprint(data, icon_url)))
+        await self.record_sample(serverip, data)
 
     @commands.hybrid_command(
         name="mcstatus",
@@ -104,72 +276,124 @@ class Minecraft(commands.Cog, name="minecraft"):
 
         icon_url = await self.fetch_icon_url(serverip) or self.default_icon_url
 
-        embed = discord.Embed(
-            title=f" ",
-            color=discord.Color.dark_embed() 
-        )
-  
-        embed.add_field(name="Server IP", value=f"__**{serverip}**__", inline=False)
-        embed.add_field(name=f"{networkemoji} Online Players", value=data["players"]["online"], inline=True)
-        embed.add_field(name="Max Players", value=data["players"]["max"], inline=True)
-        embed.add_field(name="Version", value=data["version"], inline=True)
+        embed = self.status_embed(serverip, data, icon_url, " ", "Status report")
 
-        if "list" in data["players"]:
-            player_names = ", ".join(data["players"]["list"])
-            embed.add_field(name="Players", value=player_names, inline=False)
+        await context.send(embed=embed)
 
-        if "motd" in data:
-            motd = "\n".join(data["motd"]["clean"])
-            embed.add_field(name="Description", value=motd, inline=False)
+    @commands.hybrid_command(
+        name="mccachestats",
+        description="Show Minecraft status cache statistics."
+    )
+    @commands.is_owner()
+    async def mccachestats(self, context: Context) -> None:
+        embed = discord.Embed(title="Minecraft Status Cache", color=discord.Color.dark_embed())
+        for name, cache in (("Server status", self.status_cache), ("Favicons", self.icon_cache)):
+            stats = cache.stats()
+            embed.add_field(
+                name=name,
+                value=(
+                    f"Entries: {stats['entries']}\n"
+                    f"Hits: {stats['hits']}\n"
+                    f"Misses: {stats['misses']}\n"
+                    f"Coalesced: {stats['coalesced']}\n"
+                    f"Hit rate: {stats['hit_rate']:.0%}"
+                ),
+                inline=True
+            )
+        await context.send(embed=embed)
 
-        embed.set_thumbnail(url=icon_url)
-        embed.set_footer(text="Status report")
+    @commands.hybrid_group(
+        name="mcstats",
+        description="Minecraft server statistics."
+    )
+    async def mcstats(self, context: Context) -> None:
+        if context.invoked_subcommand is None:
+            await context.send("Use `/mcstats history <serverip>` to see player trends for a tracked server.")
 
-        await context.send(embed=embed)
+    @mcstats.command(
+        name="history",
+        description="Show peak and average player trends for a tracked server."
+    )
+    @app_commands.describe(serverip="The server address", period="How far back to look")
+    @app_commands.choices(period=[app_commands.Choice(name=name.capitalize(), value=name) for name in HISTORY_PERIODS])
+    async def mcstats_history(self, context: Context, serverip: str, period: str = "day") -> None:
+        if period not in HISTORY_PERIODS:
+            await context.send(f"Unknown period. Choose from {', '.join(HISTORY_PERIODS)}.")
+            return
 
-    @tasks.loop(seconds=600)
-    async def mcstats_task(self):
-        for serverip, message in self.server_data_cache.items():
-            data = await self.fetch_server_data(serverip)
-            if "error" in data:
-                await message.delete()
-                self.server_data_cache.pop(serverip, None)
-                continue
-
-            if not data.get("online"):
-                await message.delete()
-                await message.channel.send(f"The server {serverip} is currently offline.")
-                self.server_data_cache.pop(serverip, None)
-                continue
-
-            icon_url = await self.fetch_icon_url(serverip) or self.default_icon_url
-
-            embed = discord.Embed(
-                title=f"Server Status: {serverip}",
-                color=discord.Color.dark_embed()
-            )
-            emoji = "<:general:1263092233079361607>"
-            emoji2 = "<:network:1270364022268760066>"
-            embed.add_field(name="Server IP", value=f"__**{serverip}**__", inline=False)
-            embed.add_field(name=f"{emoji2} Online Players", value=data["players"]["online"], inline=True)
-            embed.add_field(name="Max Players", value=data["players"]["max"], inline=True)
-            embed.add_field(name="Version", value=data["version"], inline=True)
+        if not self.is_tracked(normalize_address(serverip)):
+            await context.send(f"{serverip} isn't being tracked. Use /livestatus to start tracking it.")
+            return
 
-            if "list" in data["players"]:
-                player_names = ", ".join(data["players"]["list"])
-                embed.add_field(name="Players", value=player_names, inline=False)
+        history, _ = await self.get_history(serverip)
+        rollup, buckets, group = HISTORY_PERIODS[period]
+        points = history.rollups[rollup].series(time.time(), buckets, group)
+        samples = sum(count for count, _, _, _ in points)
+        if not samples:
+            await context.send(f"No history recorded for {serverip} yet. Use /livestatus to start tracking it.")
+            return
 
-            if "motd" in data:
-                motd = "\n".join(data["motd"]["clean"])
-                embed.add_field(name="Description", value=motd, inline=False)
+        averages = [total / count if count else None for count, total, _, _ in points]
+        peaks = [peak if count else None for count, _, peak, _ in points]
+        capacity = next((cap for count, _, _, cap in reversed(points) if count), 0)
 
-            embed.set_thumbnail(url=icon_url)
-            embed.set_footer(text="Updates every 10 minutes")
+        embed = discord.Embed(
+            title=f"Player history: {serverip}",
+            description=f"```\nAvg  {sparkline(averages)}\nPeak {sparkline(peaks)}\n```",
+            color=discord.Color.dark_embed()
+        )
+        embed.add_field(name=f"{networkemoji} Peak Players", value=max(p for p in peaks if p is not None), inline=True)
+        embed.add_field(name="Average Players", value=f"{sum(total for _, total, _, _ in points) / samples:.1f}", inline=True)
+        embed.add_field(name="Max Players", value=capacity, inline=True)
+        embed.set_footer(text=f"Last {period} - {samples} samples")
+        await context.send(embed=embed)
 
+    @tasks.loop(seconds=15)
+    async def mcstats_task(self):
+        now = time.monotonic()
+        due = [server for server in self.tracked.values() if server.next_due <= now]
+        if due:
+            # One board failing must not stop the loop for every other server.
+            results = await asyncio.gather(*(self.refresh_server(server) for server in due), return_exceptions=True)
+            for server, result in zip(due, results):
+                if isinstance(result, Exception):
+                    self.bot.logger.warning(f"Refreshing {server.serverip} for guild {server.guild_id} failed: {result!r}")
+
+    @mcstats_task.before_loop
+    async def before_mcstats_task(self):
+        await self.bot.wait_until_ready()
+
+    async def refresh_server(self, server: TrackedServer) -> None:
+        async with self.refresh_limit:
+            server.next_due = self.next_due()
+            serverip, message = server.serverip, server.message
+            data, icon_url = await asyncio.gather(
+                self.fetch_server_data(serverip),
+                self.fetch_icon_url(serverip)
+            )
             try:
+                if "error" in data:
+                    self.untrack(server)
+                    await message.delete()
+                    return
+
+                if not data.get("online"):
+                    self.untrack(server)
+                    await message.delete()
+                    await message.channel.send(f"The server {serverip} is currently offline.")
+                    return
+
+                await self.record_sample(serverip, data)
+                icon_url = icon_url or self.default_icon_url
+                fingerprint = self.fingerprint(data, icon_url)
+                if fingerprint == server.fingerprint:
+                    return
+
+                embed = self.status_embed(serverip, data, icon_url, f"Server Status: {serverip}", "Updates every 10 minutes")
                 await message.edit(embed=embed)
+                server.fingerprint = fingerprint
             except discord.NotFound:
-                self.server_data_cache.pop(serverip, None)
+                self.untrack(server)
 
 async def setup(bot) -> None:
     await bot.add_cog(Minecraft(bot))
\ No newline at end of file
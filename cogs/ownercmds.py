@@ -176,6 +176,26 @@ class Owner(commands.Cog, name="owner"):
         await context.send(embed=embed)
         await self.bot.close()
 
+    @commands.hybrid_command(
+        name="pipelinestats",
+        description="Show how long each on_message stage takes.",
+    )
+    @commands.is_owner()
+    async def pipelinestats(self, context: Context) -> None:
+        """
+        Shows the per-stage counters of the message pipeline.
+
+        :param context: The hybrid command context.
+        """
+        lines = [
+            f"**{name}** - {handled}/{seen} messages, avg {avg:.2f} ms, max {peak:.2f} ms, {errors} errors"
+            for name, seen, handled, errors, avg, peak in self.bot.pipeline.report()
+        ]
+        embed = discord.Embed(
+            title="Message Pipeline", description="\n".join(lines), color=0xBEBEFE
+        )
+        await context.send(embed=embed)
+
     @commands.hybrid_command(
         name="say",
         description="The bot will repeat anything you want it to say.",
@@ -1,11 +1,110 @@
 from discord.ext import commands
+from discord import app_commands
 import discord
+import asyncio
+import time
+from utils.polls import PollEngine
+from utils.preview import PreviewRenderer
+
+NUMBER_EMOJIS = ('1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟')
+
+def results_embed(poll, final=False):
+    embed = discord.Embed(
+        title="Poll Results" if final else "Poll",
+        description=poll.question,
+        color=discord.Color.dark_grey() if final else discord.Color.blue()
+    )
+    for idx, (label, votes, share) in enumerate(poll.results()):
+        bar = "█" * round(share * 20) + "░" * (20 - round(share * 20))
+        embed.add_field(name=f"{NUMBER_EMOJIS[idx]} {label}", value=f"`{bar}` {votes} ({share:.0%})", inline=False)
+    footer = f"Poll #{poll.id} | {poll.total} votes"
+    if final:
+        footer += " | Closed"
+    embed.set_footer(text=footer)
+    if poll.closes_at and not final:
+        embed.add_field(name="Closes", value=f"<t:{int(poll.closes_at)}:R>", inline=False)
+    return embed
+
+class PollVoteButton(discord.ui.DynamicItem[discord.ui.Button], template=r"poll:(?P<poll_id>\d+):(?P<idx>\d+)"):
+    """
+    Vote button for one poll option. The poll id and option live in the
+    custom_id, so a single registration serves every poll, including those
+    posted before a restart.
+    """
+
+    def __init__(self, poll_id, idx, label=None):
+        super().__init__(discord.ui.Button(
+            label=label[:80] if label else None,
+            emoji=NUMBER_EMOJIS[idx],
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"poll:{poll_id}:{idx}"
+        ))
+        self.poll_id = poll_id
+        self.idx = idx
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['poll_id']), int(match['idx']))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Poll")
+        if cog is not None:
+            await cog.button_vote(interaction, self.poll_id, self.idx)
+
+def vote_view(poll):
+    view = discord.ui.View(timeout=None)
+    for idx, label in enumerate(poll.options):
+        view.add_item(PollVoteButton(poll.id, idx, label))
+    return view
 
 class Poll(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.polls = {}
-        self.user_reactions = {}
+        self.engine = PollEngine(bot.db)
+        self.closers = {}
+        self.refresher = PreviewRenderer(window=bot.cfg.get("poll_refresh_window", 5.0))
+
+    async def cog_load(self):
+        self.bot.add_dynamic_items(PollVoteButton)
+        for poll in await self.engine.restore():
+            if poll.closes_at:
+                self.schedule_close(poll)
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(PollVoteButton)
+        self.refresher.close()
+        for task in self.closers.values():
+            task.cancel()
+
+    def schedule_close(self, poll):
+        self.closers[poll.id] = asyncio.create_task(self.close_later(poll))
+
+    async def close_later(self, poll):
+        await self.bot.wait_until_ready()
+        await asyncio.sleep(max(poll.closes_at - time.time(), 0))
+        self.closers.pop(poll.id, None)
+        await self.finish_poll(poll)
+
+    async def finish_poll(self, poll):
+        """Close a poll and publish its final results."""
+        task = self.closers.pop(poll.id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if not await self.engine.close(poll):
+            return
+        channel = self.bot.get_partial_messageable(poll.channel_id, guild_id=poll.guild_id)
+        embed = results_embed(poll, final=True)
+        try:
+            if poll.message_id:
+                self.refresher.cancel(poll.message_id)
+                await asyncio.gather(
+                    channel.get_partial_message(poll.message_id).edit(embed=embed, view=None),
+                    channel.send(embed=embed, reference=discord.MessageReference(message_id=poll.message_id, channel_id=poll.channel_id, fail_if_not_exists=False))
+                )
+            else:
+                await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            self.bot.logger.warning(f"Could not publish results for poll #{poll.id}: {e}")
 
     @commands.hybrid_group(name="poll", with_app_command=True)
     async def poll(self, ctx: commands.Context):
@@ -14,7 +113,11 @@ class Poll(commands.Cog):
             await ctx.send("Use `/poll start` to start a new poll.")
 
     @poll.command(name="start")
-    async def start_poll(self, ctx: commands.Context, question: str, option1: str, option2: str, option3: str = None, option4: str = None, option5: str = None, option6: str = None, option7: str = None, option8: str = None, option9: str = None, option10: str = None):
+    @app_commands.describe(
+        duration="Close the poll automatically after this many minutes",
+        reactions="Vote with number reactions instead of buttons"
+    )
+    async def start_poll(self, ctx: commands.Context, question: str, option1: str, option2: str, option3: str = None, option4: str = None, option5: str = None, option6: str = None, option7: str = None, option8: str = None, option9: str = None, option10: str = None, duration: int = None, reactions: bool = False):
         """Starts a new poll with the given question and options."""
         options = [option1, option2, option3, option4, option5, option6, option7, option8, option9, option10]
         options = [opt for opt in options if opt]
@@ -23,44 +126,110 @@ class Poll(commands.Cog):
             await ctx.send("A poll must have at least two options.")
             return
 
+        closes_at = time.time() + duration * 60 if duration and duration > 0 else None
+        mode = "reactions" if reactions else "buttons"
+        poll = await self.engine.create(ctx.guild.id if ctx.guild else None, ctx.channel.id, ctx.author.id, question, options, closes_at, mode)
+
+        if mode == "buttons":
+            message = await ctx.send(embed=results_embed(poll), view=vote_view(poll))
+            await self.engine.attach(poll, message.id)
+            if closes_at:
+                self.schedule_close(poll)
+            return
+
         embed = discord.Embed(title="Poll", description=question, color=discord.Color.blue())
         for idx, option in enumerate(options, start=1):
             embed.add_field(name=f"Option {idx}", value=option, inline=False)
-        
+        if closes_at:
+            embed.add_field(name="Closes", value=f"<t:{int(closes_at)}:R>", inline=False)
+        embed.set_footer(text=f"Poll #{poll.id}")
+
         message = await ctx.send(embed=embed)
-        self.polls[message.id] = {
-            "channel_id": message.channel.id,
-            "question": question,
-            "options": {emoji: idx for idx, emoji in enumerate(('1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟')[:len(options)], start=1)}
-        }
-        self.user_reactions[message.id] = {}
-
-        for emoji in self.polls[message.id]["options"]:
+        await self.engine.attach(poll, message.id)
+        if closes_at:
+            self.schedule_close(poll)
+
+        for emoji in NUMBER_EMOJIS[:len(options)]:
             await message.add_reaction(emoji)
+
+    @poll.command(name="results")
+    @app_commands.describe(poll_id="The number shown in the poll's footer")
+    async def poll_results(self, ctx: commands.Context, poll_id: int):
+        """Shows the current or final results of a poll."""
+        poll = await self.engine.load(poll_id)
+        if poll is None or (ctx.guild and poll.guild_id != ctx.guild.id):
+            await ctx.send(f"Poll #{poll_id} was not found.", ephemeral=True)
+            return
+        await ctx.send(embed=results_embed(poll, final=poll.closed), ephemeral=True)
+
+    @poll.command(name="close")
+    @app_commands.describe(poll_id="The number shown in the poll's footer")
+    async def poll_close(self, ctx: commands.Context, poll_id: int):
+        """Closes a poll now and publishes its results."""
+        poll = self.engine.get(poll_id)
+        if poll is None or (ctx.guild and poll.guild_id != ctx.guild.id):
+            await ctx.send(f"Poll #{poll_id} is not open.", ephemeral=True)
+            return
+        if ctx.author.id != poll.author_id and not ctx.channel.permissions_for(ctx.author).manage_messages:
+            await ctx.send("Only the poll's author or a moderator can close it.", ephemeral=True)
+            return
+        await ctx.send(f"Closing poll #{poll_id}.", ephemeral=True)
+        await self.finish_poll(poll)
+
+    async def button_vote(self, interaction: discord.Interaction, poll_id, idx):
+        """
+        Vote from a poll button: pressing your current option withdraws
+        the vote, any other option casts or moves it. The voter gets one
+        ephemeral reply and the results embed is refreshed at most once
+        per ``poll_refresh_window`` seconds however many votes arrive.
+        """
+        poll = self.engine.get(poll_id)
+        if poll is None or idx >= len(poll.options):
+            await interaction.response.send_message("This poll is closed.", ephemeral=True)
+            return
+        label = poll.options[idx]
+        if poll.voters.get(interaction.user.id) == idx:
+            await self.engine.unvote(poll, interaction.user.id, idx)
+            text = f"Your vote for {NUMBER_EMOJIS[idx]} **{label}** was withdrawn."
+        elif await self.engine.vote(poll, interaction.user.id, idx) is None:
+            text = f"Your vote for {NUMBER_EMOJIS[idx]} **{label}** has been counted."
+        else:
+            text = f"Your vote was changed to {NUMBER_EMOJIS[idx]} **{label}**."
+        await interaction.response.send_message(text, ephemeral=True)
+        if interaction.message is not None:
+            self.refresher.schedule(interaction.message, results_embed(poll))
+
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        if user.bot:
+    async def on_raw_reaction_add(self, payload):
+        if payload.user_id == self.bot.user.id:
+            return
+        poll = self.engine.for_message(payload.message_id)
+        if poll is None or poll.mode != "reactions" or str(payload.emoji) not in NUMBER_EMOJIS[:len(poll.options)]:
             return
-        message_id = reaction.message.id
-        if message_id in self.polls:
-            if user.id in self.user_reactions[message_id]:
-                await reaction.remove(user) 
-                return
-            self.user_reactions[message_id][user.id] = reaction.emoji
+        if payload.member is not None and payload.member.bot:
+            return
+        idx = NUMBER_EMOJIS.index(str(payload.emoji))
+        current = poll.voters.get(payload.user_id)
+        if current is not None and current != idx:
+            message = self.bot.get_partial_messageable(payload.channel_id).get_partial_message(payload.message_id)
+            await message.remove_reaction(payload.emoji, discord.Object(payload.user_id))
+            return
+        await self.engine.vote(poll, payload.user_id, idx)
 
-            channel_id = self.polls[message_id]["channel_id"]
-            question = self.polls[message_id]["question"]
-            await self.send_ephemeral_message(user, question, reaction.emoji)
+        user = payload.member or self.bot.get_user(payload.user_id)
+        if user is not None:
+            await self.send_ephemeral_message(user, poll.question, payload.emoji)
 
     @commands.Cog.listener()
-    async def on_reaction_remove(self, reaction, user):
-        if user.bot:
+    async def on_raw_reaction_remove(self, payload):
+        if payload.user_id == self.bot.user.id:
+            return
+        poll = self.engine.for_message(payload.message_id)
+        if poll is None or poll.mode != "reactions" or str(payload.emoji) not in NUMBER_EMOJIS[:len(poll.options)]:
             return
-        message_id = reaction.message.id
-        if message_id in self.polls:
-            if user.id in self.user_reactions[message_id]:
-                del self.user_reactions[message_id][user.id]
-            await reaction.message.add_reaction(reaction.emoji)
+        await self.engine.unvote(poll, payload.user_id, NUMBER_EMOJIS.index(str(payload.emoji)))
+        message = self.bot.get_partial_messageable(payload.channel_id).get_partial_message(payload.message_id)
+        await message.add_reaction(payload.emoji)
 
     async def send_ephemeral_message(self, user, question, emoji):
         embed = discord.Embed(
@@ -78,4 +247,4 @@ class Poll(commands.Cog):
             pass
 
 async def setup(bot):
-    await bot.add_cog(Poll(bot))
\ No newline at end of file
+    await bot.add_cog(Poll(bot))
@@ -1,77 +1,308 @@
 import discord
 from discord.ext import commands
 from discord.ui import Select, View, Modal, TextInput
-import json
-import os
 import asyncio
-import io
+import time
+import json
+from collections import ChainMap, Counter, defaultdict
+from discord import app_commands
+from utils.archive import TranscriptArchive
+from utils.ticketstats import CLOSE, OPEN, REPLY, GuildTicketStats
+from utils.timeseries import sparkline
+from utils.transcripts import TranscriptExporter
+
+DEFAULT_SETTINGS = {
+    'ticket_log_channel_id': None,
+    'ticket_category_id': None,
+    'ticket_staff_role_ids': [1283000154919800926],
+    'ticket_title': "Create a Ticket",
+    'ticket_description': "Please select the relevant option to open a ticket.\n\n",
+    'ticket_thumbnail': None,
+    'ticket_author_text': None,
+    'ticket_author_icon_url': None,
+    'ticket_footer_icon_url': None,
+    'ticket_image': None,
+    'ticket_fields': []
+}
+PANEL_KEYS = frozenset((
+    'ticket_title', 'ticket_description', 'ticket_thumbnail', 'ticket_author_text',
+    'ticket_author_icon_url', 'ticket_footer_icon_url', 'ticket_image', 'ticket_fields'
+))
+
+class TicketRecord:
+    # ``closing`` is runtime-only: set while the transcript is exported so
+    # a second click on Close doesn't start another export.
+    __slots__ = ("channel_id", "guild_id", "user_id", "opened_at", "responded_at", "closing")
+
+    def __init__(self, channel_id, guild_id, user_id, opened_at, responded_at=None):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.opened_at = opened_at
+        self.responded_at = responded_at
+        self.closing = False
+
+    def pack(self):
+        return [self.guild_id, self.user_id, self.opened_at, self.responded_at]
+
+class TicketRegistry:
+    """
+    Open tickets indexed by channel id and by (guild id, user id), kept
+    in a compact JSON document so the index survives restarts.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.by_channel = {}
+        self.by_owner = {}
+        for channel_id, packed in store.data.items():
+            self._index(TicketRecord(int(channel_id), *packed))
+
+    def _index(self, record):
+        self.by_channel[record.channel_id] = record
+        self.by_owner[(record.guild_id, record.user_id)] = record
+
+    def get(self, channel_id):
+        return self.by_channel.get(channel_id)
+
+    def open_for(self, guild_id, user_id):
+        return self.by_owner.get((guild_id, user_id))
+
+    def add(self, channel_id, guild_id, user_id):
+        record = TicketRecord(channel_id, guild_id, user_id, time.time())
+        self._index(record)
+        self.store.data[str(channel_id)] = record.pack()
+        self.store.mark_dirty()
+        return record
+
+    def mark_responded(self, record, at):
+        record.responded_at = at
+        self.store.data[str(record.channel_id)] = record.pack()
+        self.store.mark_dirty()
+
+    def remove(self, channel_id):
+        record = self.by_channel.pop(channel_id, None)
+        if record is None:
+            return None
+        if self.by_owner.get((record.guild_id, record.user_id)) is record:
+            del self.by_owner[(record.guild_id, record.user_id)]
+        self.store.data.pop(str(channel_id), None)
+        self.store.mark_dirty()
+        return record
+
+    def reconcile(self, bot):
+        """Drop tickets whose channel was deleted while the bot was offline and return them."""
+        removed = []
+        for record in list(self.by_channel.values()):
+            guild = bot.get_guild(record.guild_id)
+            if guild is not None and guild.get_channel(record.channel_id) is None:
+                removed.append(self.remove(record.channel_id))
+        return removed
+
+class OpenTicketButton(discord.ui.Button):
+    def __init__(self, parent_cog):
+        super().__init__(label="General Support", style=discord.ButtonStyle.primary, custom_id="ticket:open")
+        self.parent_cog = parent_cog
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.parent_cog.open_ticket(interaction)
+
+class CloseTicketButton(discord.ui.Button):
+    def __init__(self, parent_cog):
+        super().__init__(label="🔒 Close Ticket", style=discord.ButtonStyle.success, custom_id="ticket:close")
+        self.parent_cog = parent_cog
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.parent_cog.close_ticket(interaction)
+
+class TicketPanelView(View):
+    """
+    Panel posted by /ticket. Its button has a fixed custom_id, so one
+    instance registered at startup serves every panel, including those
+    posted before a restart.
+    """
+
+    def __init__(self, parent_cog):
+        super().__init__(timeout=None)
+        self.add_item(OpenTicketButton(parent_cog))
+
+class TicketControlsView(View):
+    """Controls inside a ticket channel; the ticket is looked up by channel id."""
+
+    def __init__(self, parent_cog):
+        super().__init__(timeout=None)
+        self.add_item(CloseTicketButton(parent_cog))
+
+async def check_manage_guild(interaction: discord.Interaction) -> bool:
+    if interaction.user.guild_permissions.manage_guild:
+        return True
+    await interaction.response.send_message("You need the Manage Server permission to change the ticket settings.", ephemeral=True)
+    return False
+
+class TicketSettingsView(View):
+    """
+    Menus posted by /ticketsetup and /ticketembed. The message is public,
+    so every interaction is checked again rather than trusting whoever
+    ran the command.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await check_manage_guild(interaction)
+
+class TicketSettingsModal(Modal):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await check_manage_guild(interaction)
 
 class TicketCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config_file_path = os.path.join('database', 'config.json')
-        self.load_config()
-        self.ticket_creators = {}
-        self.persistent_views_added = False
+        self.store = bot.storage.open('config.json', dict(DEFAULT_SETTINGS))
+        self.config = self.store.data
+        self.guild_settings = {}
+        self.panel_embeds = {}
+        self.registry = TicketRegistry(bot.storage.open('tickets.json', indent=None))
+        self.creation_locks = defaultdict(asyncio.Lock)
+        self.archive = TranscriptArchive(bot.db, bot.cfg.get('ticket_archive_dir', 'database/transcripts'))
+        self.stats = defaultdict(GuildTicketStats)
+
+    async def cog_load(self):
+        self.bot.add_view(TicketPanelView(self))
+        self.bot.add_view(TicketControlsView(self))
+        for row in await self.bot.db.fetchall("SELECT guild_id, data FROM ticket_config"):
+            self.guild_settings[row['guild_id']] = json.loads(row['data'])
+        for row in await self.bot.db.fetchall("SELECT guild_id, data FROM ticket_stats"):
+            self.stats[row['guild_id']].unpack(json.loads(row['data']))
+        self.bot.pipeline.register("tickets", self.handle_message, self.wants_message)
+
+    async def cog_unload(self):
+        self.bot.pipeline.unregister("tickets")
 
     @commands.Cog.listener()
     async def on_ready(self):
-        if not self.persistent_views_added:
-            self.bot.add_view(self.TicketSelect(self))
-            self.persistent_views_added = True
+        for record in self.registry.reconcile(self.bot):
+            await self.record_event(record, CLOSE, None)
+        backlog = Counter(record.guild_id for record in self.registry.by_channel.values())
+        for guild_id, stats in self.stats.items():
+            stats.backlog = backlog[guild_id]
+
+    async def record_event(self, record, kind, actor_id, at=None):
+        """Append a lifecycle event and fold it into the guild's running aggregates in one write."""
+        at = time.time() if at is None else at
+        stats = self.stats[record.guild_id]
+        stats.apply(kind, at, record.opened_at)
+        event = (record.guild_id, record.channel_id, kind, actor_id, at)
+        packed = (record.guild_id, json.dumps(stats.pack(), separators=(',', ':')))
+
+        def write(conn):
+            conn.execute("INSERT INTO ticket_events (guild_id, ticket_id, kind, actor_id, at) VALUES (?, ?, ?, ?, ?)", event)
+            conn.execute("INSERT OR REPLACE INTO ticket_stats (guild_id, data) VALUES (?, ?)", packed)
+
+        await self.bot.db.run(write)
+
+    def is_staff(self, member):
+        if not isinstance(member, discord.Member):
+            return False
+        if member.guild_permissions.manage_channels:
+            return True
+        staff_role_ids = self.settings(member.guild.id)['ticket_staff_role_ids']
+        return any(member.get_role(role_id) is not None for role_id in staff_role_ids)
+
+    def wants_message(self, ctx):
+        record = self.registry.get(ctx.channel_id)
+        return record is not None and record.responded_at is None and ctx.author_id != record.user_id
+
+    async def handle_message(self, ctx):
+        record = self.registry.get(ctx.channel_id)
+        if record is None or record.responded_at is not None or not self.is_staff(ctx.message.author):
+            return
+        self.registry.mark_responded(record, ctx.message.created_at.timestamp())
+        await self.record_event(record, REPLY, ctx.author_id, record.responded_at)
+
+    def settings(self, guild_id):
+        """This guild's ticket settings, falling back to database/config.json and then the built-in defaults."""
+        return ChainMap(self.guild_settings.get(guild_id, {}), self.config, DEFAULT_SETTINGS)
+
+    async def update_settings(self, guild_id, **changes):
+        overrides = self.guild_settings.setdefault(guild_id, {})
+        overrides.update(changes)
+        if PANEL_KEYS.intersection(changes):
+            self.panel_embeds.pop(guild_id, None)
+        await self.bot.db.execute(
+            "INSERT OR REPLACE INTO ticket_config (guild_id, data) VALUES (?, ?)",
+            (guild_id, json.dumps(overrides))
+        )
 
-    def load_config(self):
-        try:
-            if os.path.exists(self.config_file_path):
-                with open(self.config_file_path, 'r') as f:
-                    self.config = json.load(f)
-            else:
-                self.config = {
-                    'ticket_title': "Create a Ticket",
-                    'ticket_description': "Please select the relevant option to open a ticket.\n\n",
-                    'ticket_thumbnail': None,
-                    'ticket_author_text': None,
-                    'ticket_author_icon_url': None,
-                    'ticket_footer_icon_url': None,
-                    'ticket_image': None,
-                    'ticket_fields': []
-                }
-        except json.JSONDecodeError as e:
-            print(f"Error loading JSON configuration: {e}")
-            self.config = {
-                'ticket_log_channel_id': None,
-                'ticket_category_id': None,
-                'ticket_title': "Create a Ticket",
-                'ticket_description': "Please select the relevant option to open a ticket.\n\n",
-                'ticket_thumbnail': None
-            }
-        except Exception as e:
-            print(f"An unexpected error occurred while loading the configuration: {e}")
-            self.config = {
-                'ticket_log_channel_id': None,
-                'ticket_category_id': None,
-                'ticket_title': "Create a Ticket",
-                'ticket_description': "Please select the relevant option to open a ticket.\n\n",
-                'ticket_thumbnail': None
-            }
+    def panel_embed(self, guild_id):
+        """The /ticket panel embed for a guild, built once and reused until its settings change."""
+        embed = self.panel_embeds.get(guild_id)
+        if embed is not None:
+            return embed
+
+        settings = self.settings(guild_id)
+        embed = discord.Embed(
+            title=settings['ticket_title'],
+            description=settings['ticket_description'],
+            color=discord.Color.orange()
+        )
+
+        thumbnail_url = settings['ticket_thumbnail']
+        if thumbnail_url:
+            embed.set_thumbnail(url=thumbnail_url)
+
+        author_text = settings['ticket_author_text']
+        author_icon_url = settings['ticket_author_icon_url']
+        if author_text and author_icon_url:
+            embed.set_author(name=author_text, icon_url=author_icon_url)
+        elif author_text:
+            embed.set_author(name=author_text)
+
+        footer_icon_url = settings['ticket_footer_icon_url']
+        if footer_icon_url:
+            embed.set_footer(text="Powered by Vanilla Development", icon_url=footer_icon_url)
 
-    def save_config(self):
-        if not os.path.exists('database'):
-            os.makedirs('database')
-        with open(self.config_file_path, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        image_url = settings['ticket_image']
+        if image_url:
+            embed.set_image(url=image_url)
 
-    def get_log_channel(self):
-        if self.config.get('ticket_log_channel_id'):
-            return self.bot.get_channel(self.config['ticket_log_channel_id'])
-        return None
+        for field in settings['ticket_fields']:
+            embed.add_field(name=field['name'], value=field['value'], inline=field.get('inline', False))
 
-    def get_ticket_category(self):
-        if self.config.get('ticket_category_id'):
-            return self.bot.get_channel(self.config['ticket_category_id'])
-        return None
+        self.panel_embeds[guild_id] = embed
+        return embed
+
+    async def export_transcript(self, channel, closed_by, progress=None):
+        """Export a ticket's transcript for upload and archive it for /ticket search in the same pass."""
+        exporter = TranscriptExporter(
+            fmt=self.bot.cfg.get('ticket_transcript_format', 'txt'),
+            compress=self.bot.cfg.get('ticket_transcript_gzip', False),
+            progress=progress
+        )
+        writer = self.archive.writer(channel.guild.id, channel.id)
+        try:
+            transcript = await exporter.export(channel, archive=writer)
+        except BaseException:
+            await writer.abort()
+            raise
+        record = self.registry.get(channel.id)
+        await writer.finish(
+            channel.name,
+            user_id=record.user_id if record else None,
+            closed_by=closed_by.id,
+            opened_at=record.opened_at if record else None
+        )
+        return transcript
+
+    def get_log_channel(self, guild):
+        channel_id = self.settings(guild.id)['ticket_log_channel_id']
+        return guild.get_channel(channel_id) if channel_id else None
+
+    def get_ticket_category(self, guild):
+        category_id = self.settings(guild.id)['ticket_category_id']
+        return guild.get_channel(category_id) if category_id else None
 
     @commands.hybrid_command(name="ticketsetup", description="Setup the ticket system")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
     async def ticketsetup(self, ctx: commands.Context):
         embed = discord.Embed(
             title="Ticket System Configuration",
@@ -85,6 +316,7 @@ class TicketCog(commands.Cog):
                 options = [
                     discord.SelectOption(label="Ticket Log Channel", description="Set the channel for ticket logs"),
                     discord.SelectOption(label="Ticket Category", description="Set the category for tickets"),
+                    discord.SelectOption(label="Staff Roles", description="Set the roles that can see and answer tickets"),
                     discord.SelectOption(label="Reset", description="Reset the configuration settings")
                 ]
                 super().__init__(placeholder="Select an option", min_values=1, max_values=1, options=options)
@@ -94,20 +326,15 @@ class TicketCog(commands.Cog):
                     await interaction.response.send_modal(TicketLogChannelModal(self.parent_cog))
                 elif self.values[0] == "Ticket Category":
                     await interaction.response.send_modal(TicketCategoryModal(self.parent_cog))
+                elif self.values[0] == "Staff Roles":
+                    await interaction.response.send_modal(TicketStaffRolesModal(self.parent_cog))
                 elif self.values[0] == "Reset":
-                    self.parent_cog.config = {
-                        'ticket_log_channel_id': None,
-                        'ticket_category_id': None,
-                        'ticket_title': "Create a Ticket",
-                        'ticket_description': "Please select the relevant option to open a ticket.\n\n",
-                        'ticket_thumbnail': None
-                    }
-                    self.parent_cog.save_config()
+                    await self.parent_cog.update_settings(interaction.guild_id, **DEFAULT_SETTINGS)
                     await interaction.response.send_message("Configuration has been reset.", ephemeral=True)
                 else:
                     await interaction.response.send_message("Invalid option selected.", ephemeral=True)
 
-        class TicketLogChannelModal(Modal):
+        class TicketLogChannelModal(TicketSettingsModal):
             def __init__(self, parent_cog):
                 super().__init__(title="Set Ticket Log Channel")
                 self.parent_cog = parent_cog
@@ -117,17 +344,16 @@ class TicketCog(commands.Cog):
             async def on_submit(self, interaction: discord.Interaction):
                 try:
                     channel_id = int(self.channel_id.value)
-                    self.parent_cog.config['ticket_log_channel_id'] = channel_id
-                    self.parent_cog.save_config()
-                    channel = self.parent_cog.bot.get_channel(channel_id)
+                    channel = interaction.guild.get_channel(channel_id)
                     if channel:
+                        await self.parent_cog.update_settings(interaction.guild_id, ticket_log_channel_id=channel_id)
                         await interaction.response.send_message(f"Ticket log channel has been set to {channel.mention}", ephemeral=True)
                     else:
                         await interaction.response.send_message("Invalid channel ID. Please try again.", ephemeral=True)
                 except ValueError:
                     await interaction.response.send_message("Invalid channel ID. Please enter a valid ID.", ephemeral=True)
 
-        class TicketCategoryModal(Modal):
+        class TicketCategoryModal(TicketSettingsModal):
             def __init__(self, parent_cog):
                 super().__init__(title="Set Ticket Category")
                 self.parent_cog = parent_cog
@@ -137,218 +363,248 @@ class TicketCog(commands.Cog):
             async def on_submit(self, interaction: discord.Interaction):
                 try:
                     category_id = int(self.category_id.value)
-                    self.parent_cog.config['ticket_category_id'] = category_id
-                    self.parent_cog.save_config()
-                    category = self.parent_cog.bot.get_channel(category_id)
+                    category = interaction.guild.get_channel(category_id)
                     if category:
+                        await self.parent_cog.update_settings(interaction.guild_id, ticket_category_id=category_id)
                         await interaction.response.send_message(f"Ticket category has been set to {category.name}", ephemeral=True)
                     else:
                         await interaction.response.send_message("Invalid category ID. Please try again.", ephemeral=True)
                 except ValueError:
                     await interaction.response.send_message("Invalid category ID. Please enter a valid ID.", ephemeral=True)
 
-        view = View()
+        class TicketStaffRolesModal(TicketSettingsModal):
+            def __init__(self, parent_cog):
+                super().__init__(title="Set Ticket Staff Roles")
+                self.parent_cog = parent_cog
+                self.role_ids = TextInput(label="Role IDs", style=discord.TextStyle.short, placeholder="Comma-separated role IDs")
+                self.add_item(self.role_ids)
+
+            async def on_submit(self, interaction: discord.Interaction):
+                try:
+                    role_ids = [int(part) for part in self.role_ids.value.replace(" ", "").split(",") if part]
+                except ValueError:
+                    await interaction.response.send_message("Invalid role ID. Please enter valid IDs.", ephemeral=True)
+                    return
+                roles = [interaction.guild.get_role(role_id) for role_id in role_ids]
+                if None in roles:
+                    await interaction.response.send_message("Invalid role ID. Please try again.", ephemeral=True)
+                    return
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_staff_role_ids=role_ids)
+                mentions = ", ".join(role.mention for role in roles) or "none"
+                await interaction.response.send_message(f"Ticket staff roles have been set to {mentions}", ephemeral=True)
+
+        view = TicketSettingsView()
         view.add_item(SetupSelect(self))
 
         await ctx.send(embed=embed, view=view)
 
-    @commands.hybrid_command(name="ticket", description="Create a ticket")
+    @commands.hybrid_group(name="ticket", description="Create a ticket", fallback="panel", invoke_without_command=True)
+    @commands.guild_only()
     async def ticket(self, ctx: commands.Context):
-        category = self.get_ticket_category()
+        category = self.get_ticket_category(ctx.guild)
         if category is None:
             await ctx.send("Ticket category is not set. Please use /ticketsetup to configure the ticket system.", ephemeral=True)
             return
 
+        await ctx.send(embed=self.panel_embed(ctx.guild.id), view=TicketPanelView(self))
+
+    @ticket.command(name="search", description="Search archived ticket transcripts")
+    @app_commands.describe(query="Words to look for in messages, authors or ticket IDs")
+    @commands.guild_only()
+    @commands.has_permissions(manage_channels=True)
+    async def ticket_search(self, ctx: commands.Context, *, query: str):
+        started = time.perf_counter()
+        results = await self.archive.search(ctx.guild.id, query)
+        elapsed = (time.perf_counter() - started) * 1000
+        if not results:
+            await ctx.send("No archived tickets matched your search.", ephemeral=True)
+            return
+
         embed = discord.Embed(
-            title=self.config.get('ticket_title', "Create a Ticket"),
-            description=self.config.get('ticket_description', "Click the button below to create a support ticket."),
-            color=discord.Color.orange()
+            title=f"Ticket search: {query[:200]}",
+            color=discord.Color.blue()
         )
+        for row in results:
+            closed = f"<t:{int(row['closed_at'])}:d>" if row['closed_at'] else "unknown"
+            opener = f"<@{row['user_id']}>" if row['user_id'] else "unknown"
+            embed.add_field(
+                name=f"#{row['channel_name'] or row['ticket_id']} ({row['ticket_id']})",
+                value=f"Opened by {opener}, closed {closed}, {row['message_count'] or 0} messages\n"
+                      f"{row['snippet'][:700]}",
+                inline=False
+            )
+        embed.set_footer(text=f"{len(results)} tickets in {elapsed:.1f} ms")
+        await ctx.send(embed=embed, ephemeral=True)
+
+
+    @ticket.command(name="stats", description="Show ticket backlog, response times and throughput")
+    @commands.guild_only()
+    @commands.has_permissions(manage_channels=True)
+    async def ticket_stats(self, ctx: commands.Context):
+        stats = self.stats.get(ctx.guild.id)
+        if stats is None or not stats.opened:
+            await ctx.send("No tickets have been opened in this server yet.", ephemeral=True)
+            return
 
-        thumbnail_url = self.config.get('ticket_thumbnail')
-        if thumbnail_url:
-            embed.set_thumbnail(url=thumbnail_url)
-
-        author_text = self.config.get('ticket_author_text')
-        author_icon_url = self.config.get('ticket_author_icon_url')
-        if author_text and author_icon_url:
-            embed.set_author(name=author_text, icon_url=author_icon_url)
-
-        footer_icon_url = self.config.get('ticket_footer_icon_url')
-        if footer_icon_url:
-            embed.set_footer(text="Powered by Vanilla Development", icon_url=footer_icon_url)
-
-        image_url = self.config.get('ticket_image')
-        if image_url:
-            embed.set_image(url=image_url)
-
-        for field in self.config.get('ticket_fields', []):
-            embed.add_field(name=field['name'], value=field['value'], inline=field.get('inline', False))
+        def duration(seconds):
+            if seconds is None:
+                return "n/a"
+            if seconds < 90:
+                return f"{seconds:.0f}s"
+            if seconds < 5400:
+                return f"{seconds / 60:.0f}m"
+            return f"{seconds / 3600:.1f}h"
+
+        opened, closed = stats.hourly(time.time())
+        embed = discord.Embed(title="Ticket Statistics", color=discord.Color.blue())
+        embed.add_field(name="Open Backlog", value=str(stats.backlog), inline=True)
+        embed.add_field(name="Opened", value=str(stats.opened), inline=True)
+        embed.add_field(name="Closed", value=str(stats.closed), inline=True)
+        embed.add_field(
+            name="First Response",
+            value=f"Median {duration(stats.first_response.quantile(0.5))}, "
+                  f"p90 {duration(stats.first_response.quantile(0.9))} "
+                  f"({stats.first_response.total} answered)",
+            inline=False
+        )
+        embed.add_field(
+            name="Last 24 Hours",
+            value=f"Opened {sum(opened)} ({sum(opened) / 24:.1f}/h) `{sparkline(opened)}`\n"
+                  f"Closed {sum(closed)} ({sum(closed) / 24:.1f}/h) `{sparkline(closed)}`",
+            inline=False
+        )
+        await ctx.send(embed=embed, ephemeral=True)
 
-        class GeneralSupportButton(discord.ui.Button):
-            def __init__(self, parent_cog):
-                super().__init__(label="General Support", style=discord.ButtonStyle.primary)
-                self.parent_cog = parent_cog
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        record = self.registry.remove(channel.id)
+        if record is not None:
+            await self.record_event(record, CLOSE, None)
 
-            async def callback(self, interaction: discord.Interaction):
-                await interaction.response.defer()
-                existing_channel = discord.utils.get(ctx.guild.text_channels, name=f"ticket-{interaction.user.name.lower()}")
-                if existing_channel:
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        for record in list(self.registry.by_channel.values()):
+            if record.guild_id == guild.id:
+                self.registry.remove(record.channel_id)
+
+    async def open_ticket(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        guild = interaction.guild
+        user = interaction.user
+
+        # Checking for an existing ticket and creating the channel happen under
+        # a per-guild lock, so a double-click waits and then finds the ticket
+        # the first click made instead of opening a second one.
+        async with self.creation_locks[guild.id]:
+            existing = self.registry.open_for(guild.id, user.id)
+            if existing is not None:
+                existing_channel = guild.get_channel(existing.channel_id)
+                if existing_channel is not None:
                     await interaction.followup.send(f"You already have an open ticket: {existing_channel.mention}", ephemeral=True)
                     return
+                self.registry.remove(existing.channel_id)
 
-                category = self.parent_cog.get_ticket_category()
-                if category is None:
-                    await interaction.followup.send("Ticket category is not set. Please use /ticketsetup to configure the ticket system.", ephemeral=True)
-                    return
-
-                overwrites = {
-                    ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                    interaction.user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                    ctx.guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                    ctx.guild.get_role(1283000154919800926): discord.PermissionOverwrite(read_messages=True, send_messages=True)  # Add role
-                }
-
-                channel = await ctx.guild.create_text_channel(
-                    name=f"ticket-{interaction.user.name.lower()}",
-                    category=category,
-                    overwrites=overwrites
-                )
-
-
-                self.parent_cog.ticket_creators[channel.id] = interaction.user.id
-
-                ticket_embed = discord.Embed(title="__Vanilla Support__", description=f"Hello **{interaction.user.name.lower()}**,\n\n> Welcome to our support team!\n> Please Describe your issue for assistance.", color=discord.Color.default())
-                ticket_embed.set_author(name=interaction.user.name, icon_url=interaction.user.avatar.url)   
-                ticket_embed.set_footer(text="\nWe do not work 24/7. Please wait for a response.")    
-                async def set_permissions():
-                    await channel.set_permissions(interaction.user, read_messages=True, send_messages=True)
-                    await channel.set_permissions(ctx.guild.default_role, read_messages=False)
-
-                async def log_ticket_creation():
-                    log_channel = self.parent_cog.get_log_channel()
-                    if log_channel:
-                        embed = discord.Embed(
-                            title="Ticket Created",
-                            description=f"A new ticket has been created.",
-                            color=discord.Color.green()
-                        )
-                        embed.add_field(name="Created By", value=interaction.user.mention, inline=True)
-                        embed.add_field(name="Channel", value=channel.mention, inline=True)
-                        embed.set_footer(text=f"Ticket ID: {channel.id}")
-                        await log_channel.send(embed=embed)
-
-                async def get_channel_transcript(channel):
-                    transcript = ""
-                    async for message in channel.history(limit=None, oldest_first=True):
-                        transcript += f"{message.created_at} - {message.author}: {message.content}\n"
-                    return transcript
-
-                async def close_ticket(interaction: discord.Interaction):
-                    if channel.id in self.parent_cog.ticket_creators and self.parent_cog.ticket_creators[channel.id] == interaction.user.id:
-                        await interaction.response.send_message("Ticket will be deleted in few seconds.", ephemeral=True)
-
-                        transcript = await get_channel_transcript(channel)
-                        log_channel = self.parent_cog.get_log_channel()
-                        if log_channel:
-                            embed = discord.Embed(
-                                title="Ticket Closed",
-                                description=f"Ticket {channel.name} has been closed by {interaction.user.mention}.",
-                                color=discord.Color.red()
-                            )
-                            embed.set_footer(text=f"Ticket ID: {channel.id}")
-                            await log_channel.send(embed=embed)
-
-                            transcript_file = discord.File(io.StringIO(transcript), filename=f"transcript-{channel.name}.txt")
-                            await log_channel.send(file=transcript_file)
-
-                        del self.parent_cog.ticket_creators[channel.id]
-                        await channel.delete()
-                    else:
-                        await interaction.response.send_message("You do not have permission to close this ticket.", ephemeral=True)
-
-                class TicketCloseButton(discord.ui.Button):
-                    def __init__(self, parent_cog):
-                        self.parent_cog = parent_cog
-                        super().__init__(label="🔒 Close Ticket", style=discord.ButtonStyle.success)
-
-                    async def callback(self, interaction: discord.Interaction):
-                        await close_ticket(interaction)
-
-                ticket_view = View(timeout=None)
-                ticket_view.add_item(TicketCloseButton(self.parent_cog))
-
-                await channel.send(content=f"{interaction.user.mention}", embed=ticket_embed, view=ticket_view)
-                await interaction.followup.send(f"Your ticket has been created: {channel.mention}", ephemeral=True)
-
-                await set_permissions()
-                await log_ticket_creation()
+            category = self.get_ticket_category(guild)
+            if category is None:
+                await interaction.followup.send("Ticket category is not set. Please use /ticketsetup to configure the ticket system.", ephemeral=True)
+                return
 
-        view = View(timeout=None)
-        view.add_item(GeneralSupportButton(self))
-
-        await ctx.send(embed=embed, view=view)
-
-
-    @commands.Cog.listener()
-    async def on_guild_channel_delete(self, channel):
-        if channel.id in self.ticket_creators:
-            del self.ticket_creators[channel.id]
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+                guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+            }
+            for role_id in self.settings(guild.id)['ticket_staff_role_ids']:
+                staff_role = guild.get_role(role_id)
+                if staff_role is not None:
+                    overwrites[staff_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+
+            channel = await guild.create_text_channel(
+                name=f"ticket-{user.name.lower()}",
+                category=category,
+                overwrites=overwrites
+            )
+            record = self.registry.add(channel.id, guild.id, user.id)
+
+        ticket_embed = discord.Embed(title="__Vanilla Support__", description=f"Hello **{user.name.lower()}**,\n\n> Welcome to our support team!\n> Please Describe your issue for assistance.", color=discord.Color.default())
+        ticket_embed.set_author(name=user.name, icon_url=user.display_avatar.url)
+        ticket_embed.set_footer(text="\nWe do not work 24/7. Please wait for a response.")
+
+        sends = [
+            self.record_event(record, OPEN, user.id, record.opened_at),
+            channel.send(content=user.mention, embed=ticket_embed, view=TicketControlsView(self)),
+            interaction.followup.send(f"Your ticket has been created: {channel.mention}", ephemeral=True)
+        ]
+
+        log_channel = self.get_log_channel(guild)
+        if log_channel:
+            embed = discord.Embed(
+                title="Ticket Created",
+                description=f"A new ticket has been created.",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Created By", value=user.mention, inline=True)
+            embed.add_field(name="Channel", value=channel.mention, inline=True)
+            embed.set_footer(text=f"Ticket ID: {channel.id}")
+            sends.append(log_channel.send(embed=embed))
+
+        for result in await asyncio.gather(*sends, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.bot.logger.warning(f"Ticket {channel.id}: {type(result).__name__}: {result}")
+
+    async def close_ticket(self, interaction: discord.Interaction):
+        channel = interaction.channel
+        record = self.registry.get(channel.id)
+        if record is None:
+            await interaction.response.send_message("This channel is not an open ticket.", ephemeral=True)
+            return
+        if record.user_id != interaction.user.id:
+            await interaction.response.send_message("You do not have permission to close this ticket.", ephemeral=True)
+            return
+        if record.closing:
+            await interaction.response.send_message("This ticket is already being closed.", ephemeral=True)
+            return
+        record.closing = True
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction):
-        if interaction.type == discord.InteractionType.component:
-            if interaction.data["component_type"] == 2:  # 2 represents buttons
-                if interaction.custom_id == "close_ticket":
-                    await self.close_ticket(interaction)
+        async def progress(count):
+            await interaction.edit_original_response(content=f"Saving transcript... {count} messages so far.")
 
-    async def close_ticket(self, interaction):
-        channel = interaction.channel
-        if channel.id in self.ticket_creators and self.ticket_creators[channel.id] == interaction.user.id:
-            await interaction.response.send_message("Closing ticket...", ephemeral=True)
-            log_channel = self.get_log_channel()
+        try:
+            await interaction.response.send_message("Ticket will be deleted in few seconds.", ephemeral=True)
+            transcript = await self.export_transcript(channel, interaction.user, progress)
+        except BaseException:
+            record.closing = False
+            raise
+        # The transcript is already archived, so a failed log upload is
+        # reported and the ticket is closed anyway.
+        log_channel = self.get_log_channel(channel.guild)
+        try:
             if log_channel:
                 embed = discord.Embed(
                     title="Ticket Closed",
                     description=f"Ticket {channel.name} has been closed by {interaction.user.mention}.",
                     color=discord.Color.red()
                 )
-                embed.set_footer(text=f"Ticket ID: {channel.id}")
+                embed.set_footer(text=f"Ticket ID: {channel.id} | {transcript.count} messages")
                 await log_channel.send(embed=embed)
 
-            del self.ticket_creators[channel.id]
-            await channel.delete()
-        else:
-            await interaction.response.send_message("You do not have permission to close this ticket.", ephemeral=True)
+                await log_channel.send(file=discord.File(transcript.file, filename=transcript.filename))
+        except discord.HTTPException as e:
+            self.bot.logger.warning(f"Could not post the transcript of ticket {channel.id} to the log channel: {e}")
+        finally:
+            transcript.file.close()
 
+        self.registry.remove(channel.id)
+        try:
+            await self.record_event(record, CLOSE, interaction.user.id)
+        finally:
+            await channel.delete()
 
     @commands.hybrid_command(name="ticketembed", description="Previews the ticket message to edit it.")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
     async def ticketembed(self, ctx: commands.Context):
-        embed = discord.Embed(
-            title=self.config.get('ticket_title', "Create a Ticket"),
-            description=self.config.get('ticket_description', "Please select the relevant option to open a ticket.\n\n"),
-            color=discord.Color.orange()
-        )
-
-        thumbnail_url = self.config.get('ticket_thumbnail')
-        if thumbnail_url:
-            embed.set_thumbnail(url=thumbnail_url)
-
-        author_text = self.config.get('ticket_author_text')
-        author_icon_url = self.config.get('ticket_author_icon_url')
-        if author_text and author_icon_url:
-            embed.set_author(name=author_text, icon_url=author_icon_url)
-
-        footer_icon_url = self.config.get('ticket_footer_icon_url')
-        if footer_icon_url:
-            embed.set_footer(text="Powered by Blocktune Development", icon_url=footer_icon_url)
-
-        image_url = self.config.get('ticket_image')
-        if image_url:
-            embed.set_image(url=image_url)
-
-        for field in self.config.get('ticket_fields', []):
-            embed.add_field(name=field['name'], value=field['value'], inline=field.get('inline', False))
+        embed = self.panel_embed(ctx.guild.id)
 
         class EmbedSetupSelect(Select):
             def __init__(self, parent_cog, preview_message):
@@ -382,51 +638,19 @@ class TicketCog(commands.Cog):
                 elif self.values[0] == "Add Field":
                     await interaction.response.send_modal(TicketFieldModal(self.parent_cog, self.preview_message))
                 elif self.values[0] == "Reset":
-                    self.parent_cog.config['ticket_description'] = "Please select the relevant option to open a ticket.\n\n"
-                    self.parent_cog.config['ticket_thumbnail'] = None
-                    self.parent_cog.config['ticket_author_text'] = None
-                    self.parent_cog.config['ticket_author_icon_url'] = None
-                    self.parent_cog.config['ticket_footer_icon_url'] = None
-                    self.parent_cog.config['ticket_image'] = None
-                    self.parent_cog.config['ticket_fields'] = []
-                    self.parent_cog.save_config()
+                    await self.parent_cog.update_settings(
+                        interaction.guild_id,
+                        **{key: value for key, value in DEFAULT_SETTINGS.items() if key in PANEL_KEYS and key != 'ticket_title'}
+                    )
                     await self.update_preview()
                     await interaction.response.send_message("Embed settings have been reset.", ephemeral=True)
                 else:
                     await interaction.response.send_message("Invalid option selected.", ephemeral=True)
 
             async def update_preview(self):
-                embed = discord.Embed(
-                    title=self.parent_cog.config.get('ticket_title', "Create a Ticket"),
-                    description=self.parent_cog.config.get('ticket_description', "Please select the relevant option to open a ticket.\n\n"),
-                    color=discord.Color.orange()
-                )
-
-                thumbnail_url = self.parent_cog.config.get('ticket_thumbnail')
-                if thumbnail_url:
-                    embed.set_thumbnail(url=thumbnail_url)
-
-                author_text = self.parent_cog.config.get('ticket_author_text')
-                author_icon_url = self.parent_cog.config.get('ticket_author_icon_url')
-                if author_text and author_icon_url:
-                    embed.set_author(name=author_text, icon_url=author_icon_url)
-                elif author_text:
-                    embed.set_author(name=author_text)
-
-                footer_icon_url = self.parent_cog.config.get('ticket_footer_icon_url')
-                if footer_icon_url:
-                    embed.set_footer(text="Powered by Blocktune Development", icon_url=footer_icon_url)
-
-                image_url = self.parent_cog.config.get('ticket_image')
-                if image_url:
-                    embed.set_image(url=image_url)
-
-                for field in self.parent_cog.config.get('ticket_fields', []):
-                    embed.add_field(name=field['name'], value=field['value'], inline=field.get('inline', False))
-
-                await self.preview_message.edit(embed=embed)
+                self.parent_cog.bot.previews.schedule(self.preview_message, self.parent_cog.panel_embed(self.preview_message.guild.id))
 
-        class TicketDescriptionModal(Modal):
+        class TicketDescriptionModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Set Ticket Embed Description")
                 self.parent_cog = parent_cog
@@ -435,15 +659,14 @@ class TicketCog(commands.Cog):
                 self.add_item(self.description)
 
             async def on_submit(self, interaction: discord.Interaction):
-                self.parent_cog.config['ticket_description'] = self.description.value
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_description=self.description.value)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed description has been set.", ephemeral=True)
 
             async def update_preview(self):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
-        class TicketThumbnailModal(Modal):
+        class TicketThumbnailModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Set Ticket Embed Thumbnail URL")
                 self.parent_cog = parent_cog
@@ -452,15 +675,14 @@ class TicketCog(commands.Cog):
                 self.add_item(self.thumbnail_url)
 
             async def on_submit(self, interaction: discord.Interaction):
-                self.parent_cog.config['ticket_thumbnail'] = self.thumbnail_url.value
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_thumbnail=self.thumbnail_url.value)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed thumbnail URL has been set.", ephemeral=True)
 
             async def update_preview(self):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
-        class TicketAuthorTextModal(Modal):
+        class TicketAuthorTextModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Set Ticket Embed Author Text")
                 self.parent_cog = parent_cog
@@ -469,15 +691,14 @@ class TicketCog(commands.Cog):
                 self.add_item(self.author_text)
 
             async def on_submit(self, interaction: discord.Interaction):
-                self.parent_cog.config['ticket_author_text'] = self.author_text.value
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_author_text=self.author_text.value)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed author text has been set.", ephemeral=True)
 
             async def update_preview(self):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
-        class TicketAuthorIconModal(Modal):
+        class TicketAuthorIconModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Set Ticket Embed Author Icon URL")
                 self.parent_cog = parent_cog
@@ -485,15 +706,14 @@ class TicketCog(commands.Cog):
                 self.author_icon_url = TextInput(label="Author Icon URL", style=discord.TextStyle.short)
                 self.add_item(self.author_icon_url)
             async def on_submit(self, interaction: discord.Interaction):
-                self.parent_cog.config['ticket_author_icon_url'] = self.author_icon_url.value
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_author_icon_url=self.author_icon_url.value)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed author icon URL has been set.", ephemeral=True)
 
             async def update_preview(self):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
-        class TicketFooterIconModal(Modal):
+        class TicketFooterIconModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Set Ticket Embed Footer Icon URL")
                 self.parent_cog = parent_cog
@@ -502,15 +722,14 @@ class TicketCog(commands.Cog):
                 self.add_item(self.footer_icon_url)
 
             async def on_submit(self, interaction: discord.Interaction):
-                self.parent_cog.config['ticket_footer_icon_url'] = self.footer_icon_url.value
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_footer_icon_url=self.footer_icon_url.value)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed footer icon URL has been set.", ephemeral=True)
 
             async def update_preview(self):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
-        class TicketImageModal(Modal):
+        class TicketImageModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Set Ticket Embed Image URL")
                 self.parent_cog = parent_cog
@@ -519,15 +738,14 @@ class TicketCog(commands.Cog):
                 self.add_item(self.image_url)
 
             async def on_submit(self, interaction: discord.Interaction):
-                self.parent_cog.config['ticket_image'] = self.image_url.value
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_image=self.image_url.value)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed image URL has been set.", ephemeral=True)
 
             async def update_preview(self):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
-        class TicketFieldModal(Modal):
+        class TicketFieldModal(TicketSettingsModal):
             def __init__(self, parent_cog, preview_message):
                 super().__init__(title="Add Ticket Embed Field")
                 self.parent_cog = parent_cog
@@ -540,14 +758,13 @@ class TicketCog(commands.Cog):
                 self.add_item(self.inline)
 
             async def on_submit(self, interaction: discord.Interaction):
-                fields = self.parent_cog.config.get('ticket_fields', [])
+                fields = list(self.parent_cog.settings(interaction.guild_id)['ticket_fields'])
                 fields.append({
                     'name': self.name.value,
                     'value': self.value.value,
                     'inline': self.inline.value.lower() == 'true'
                 })
-                self.parent_cog.config['ticket_fields'] = fields
-                self.parent_cog.save_config()
+                await self.parent_cog.update_settings(interaction.guild_id, ticket_fields=fields)
                 await self.update_preview()
                 await interaction.response.send_message(f"Ticket embed field has been added.", ephemeral=True)
 
@@ -555,7 +772,7 @@ class TicketCog(commands.Cog):
                 await EmbedSetupSelect(self.parent_cog, self.preview_message).update_preview()
 
         preview_message = await ctx.send(content="Preview message:", embed=embed)
-        view = View()
+        view = TicketSettingsView()
         view.add_item(EmbedSetupSelect(self, preview_message))
 
         await preview_message.edit(embed=embed, view=view)
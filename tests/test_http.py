@@ -0,0 +1,95 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+
+from utils.http import HTTPClient
+
+
+class StubServer:
+    """Local HTTP server replying from a list of ``(status, headers, body, delay)`` per path."""
+
+    def __init__(self, routes: dict) -> None:
+        self.routes = {path: list(replies) for path, replies in routes.items()}
+        self.hits = []
+        self.peers = set()
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_route("*", "/{path}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.runner.cleanup()
+
+    async def handle(self, request):
+        path = request.match_info["path"]
+        self.hits.append(path)
+        self.peers.add(request.transport.get_extra_info("peername"))
+        replies = self.routes[path]
+        status, headers, body, delay = replies.pop(0) if len(replies) > 1 else replies[0]
+        if delay:
+            await asyncio.sleep(delay)
+        return web.Response(status=status, headers=headers, body=body)
+
+
+def reply(status=200, headers=None, body=b"", delay=0):
+    return status, headers or {}, body, delay
+
+
+class HTTPClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = HTTPClient(timeout=0.5, retries=2, backoff=0.01, max_retry_delay=1.0)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_retries_server_errors(self):
+        async with StubServer({"status": [reply(503), reply(502), reply(200, body=b'{"ok": true}')]}) as server:
+            response = await self.client.get_json(f"{server.url}/status")
+        self.assertEqual((response.status, response.data), (200, {"ok": True}))
+        self.assertEqual(len(server.hits), 3)
+
+    async def test_gives_up_after_retries(self):
+        async with StubServer({"status": [reply(500)]}) as server:
+            response = await self.client.get(f"{server.url}/status")
+        self.assertEqual(response.status, 500)
+        self.assertEqual(len(server.hits), 3)
+
+    async def test_honours_short_retry_after(self):
+        async with StubServer({"status": [reply(429, {"Retry-After": "0.2"}), reply(200)]}) as server:
+            started = time.monotonic()
+            response = await self.client.get(f"{server.url}/status")
+        self.assertEqual(response.status, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    async def test_long_retry_after_returns_at_once(self):
+        async with StubServer({"status": [reply(429, {"Retry-After": "3600"}), reply(200)]}) as server:
+            started = time.monotonic()
+            response = await self.client.get(f"{server.url}/status")
+        self.assertEqual(response.status, 429)
+        self.assertEqual(len(server.hits), 1)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_timeout_is_retried_then_raised(self):
+        async with StubServer({"slow": [reply(delay=2)]}) as server:
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.client.get(f"{server.url}/slow")
+        self.assertEqual(len(server.hits), 3)
+
+    async def test_connections_are_reused(self):
+        async with StubServer({"icon": [reply(body=b"\x89PNG" + b"\0" * 4096)]}) as server:
+            for _ in range(5):
+                response = await self.client.get(f"{server.url}/icon")
+                self.assertEqual(response.status, 200)
+        self.assertEqual(len(server.peers), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
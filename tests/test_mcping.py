@@ -0,0 +1,100 @@
+import asyncio
+import json
+import unittest
+
+from utils import mcping
+
+
+class FakeServer:
+    """Answers one Server List Ping per connection with a canned reply."""
+
+    def __init__(self, reply) -> None:
+        self.reply = reply
+        self.handshakes = []
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer) -> None:
+        try:
+            handshake = await reader.readexactly(await mcping.read_varint(reader))
+            self.handshakes.append(handshake)
+            await reader.readexactly(await mcping.read_varint(reader))
+            if isinstance(self.reply, bytes):
+                writer.write(self.reply)
+            else:
+                writer.write(mcping.packet(0x00, mcping.pack_string(json.dumps(self.reply))))
+            await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+
+STATUS = {
+    "version": {"name": "§aPaper 1.20.4", "protocol": 765},
+    "players": {"max": 100, "online": 2, "sample": [{"name": "Steve", "id": "0"}, {"name": "Alex", "id": "1"}]},
+    "description": {"text": "§6Hello ", "extra": [{"text": "world"}, "\nsecond line"]},
+}
+
+
+class StatusTest(unittest.IsolatedAsyncioTestCase):
+    async def test_status_from_fake_server(self):
+        async with FakeServer(STATUS) as server:
+            data = await mcping.status(f"127.0.0.1:{server.port}", timeout=2)
+        self.assertEqual(data, {
+            "online": True,
+            "players": {"online": 2, "max": 100, "list": ["Steve", "Alex"]},
+            "version": "Paper 1.20.4",
+            "motd": {"clean": ["Hello world", "second line"]},
+        })
+        self.assertIn(b"127.0.0.1", server.handshakes[0])
+
+    async def test_malformed_replies_raise_value_error(self):
+        replies = [
+            ["not", "an", "object"],
+            {"version": "1.8"},
+            {"players": {"online": "many"}},
+            {"players": {"sample": "Steve"}},
+            "[" * 5000 + "]" * 5000,
+        ]
+        for reply in replies:
+            if isinstance(reply, str):
+                reply = mcping.packet(0x00, mcping.pack_string(reply))
+            with self.subTest(reply=repr(reply)[:40]):
+                async with FakeServer(reply) as server:
+                    with self.assertRaises(ValueError):
+                        await mcping.status(f"127.0.0.1:{server.port}", timeout=2)
+
+    async def test_oversized_reply_is_rejected_before_reading(self):
+        reply = mcping.pack_varint(mcping.MAX_RESPONSE + 1)
+        async with FakeServer(reply) as server:
+            with self.assertRaises(ValueError):
+                await mcping.status(f"127.0.0.1:{server.port}", timeout=2)
+
+    async def test_out_of_range_port(self):
+        for address in ("localhost:70000", "localhost:0"):
+            with self.subTest(address=address), self.assertRaises(ValueError):
+                await mcping.status(address, timeout=2)
+
+    async def test_silent_server_times_out(self):
+        async def handle(reader, writer):
+            await reader.read()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            with self.assertRaises(asyncio.TimeoutError):
+                await mcping.status(f"127.0.0.1:{port}", timeout=0.2)
+        finally:
+            server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+
+from utils.transcripts import to_record
+
+
+def fts_query(text: str) -> str:
+    """Quote each word so user input can't trip FTS5 query syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class ArchiveWriter:
+    """
+    Writes one closed ticket to a gzip JSON-lines file and feeds it to the
+    full-text index.
+
+    Messages are indexed in chunks of up to ``batch_size`` as one document
+    each ("author: content" lines), so a ticket is usually a single row and
+    ranking work scales with tickets rather than messages. File writes
+    happen once per chunk in a worker thread, so compression never runs on
+    the event loop.
+    """
+
+    def __init__(self, archive, guild_id: int, ticket_id: int) -> None:
+        self.archive = archive
+        self.guild_id = guild_id
+        self.ticket_id = ticket_id
+        self.path = os.path.join(archive.root, str(guild_id), f"{ticket_id}.jsonl.gz")
+        self._tmp = f"{self.path}.tmp"
+        self._file = None
+        self._records = []
+        self._lines = []
+        self._authors = set()
+        self.count = 0
+
+    def _write(self, text: str) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = gzip.open(self._tmp, "wt", encoding="utf-8")
+        self._file.write(text)
+
+    def _commit(self, text: str) -> None:
+        self._write(text)
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def _discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+    def _take_records(self) -> str:
+        text = "".join(json.dumps(record) + "\n" for record in self._records)
+        self._records = []
+        return text
+
+    async def add(self, message) -> None:
+        record = to_record(message)
+        self._records.append(record)
+        self.count += 1
+        content = record["content"]
+        for embed in message.embeds:
+            content += f" {embed.title or ''} {embed.description or ''}"
+        if content.strip():
+            self._lines.append(f"{record['author']}: {content}")
+            self._authors.add(record["author"])
+        if len(self._records) >= self.archive.batch_size:
+            await asyncio.to_thread(self._write, self._take_records())
+        if len(self._lines) >= self.archive.batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._lines:
+            return
+        row = ("\n".join(self._lines), " ".join(self._authors), str(self.ticket_id), self.guild_id)
+        self._lines = []
+        self._authors = set()
+        await self.archive.db.execute(
+            "INSERT INTO ticket_search (content, author, ticket_id, guild_id) VALUES (?, ?, ?, ?)",
+            row
+        )
+
+    async def finish(self, channel_name: str, user_id: int = None, closed_by: int = None, opened_at: float = None) -> None:
+        await asyncio.to_thread(self._commit, self._take_records())
+        await self._flush()
+        await self.archive.db.execute(
+            "INSERT OR REPLACE INTO ticket_archive "
+            "(ticket_id, guild_id, user_id, channel_name, closed_by, opened_at, closed_at, message_count, path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.ticket_id, self.guild_id, user_id, channel_name, closed_by, opened_at, time.time(), self.count, self.path)
+        )
+
+    async def abort(self) -> None:
+        """Discard the partial file and whatever was already indexed."""
+        self._records = []
+        self._lines = []
+        await asyncio.to_thread(self._discard)
+        await self.archive.db.execute(
+            "DELETE FROM ticket_search WHERE ticket_id = ? AND guild_id = ?",
+            (str(self.ticket_id), self.guild_id)
+        )
+
+
+class TranscriptArchive:
+    """
+    Local store of closed-ticket transcripts.
+
+    Transcripts are kept as gzip-compressed JSON lines under
+    ``root/<guild id>/<ticket id>.jsonl.gz``; their messages are indexed in
+    the ``ticket_search`` FTS5 table so searches are ranked with bm25 and
+    never touch the files themselves.
+    """
+
+    def __init__(self, db, root: str = "database/transcripts", batch_size: int = 500) -> None:
+        self.db = db
+        self.root = root
+        self.batch_size = batch_size
+
+    def writer(self, guild_id: int, ticket_id: int) -> ArchiveWriter:
+        return ArchiveWriter(self, guild_id, ticket_id)
+
+    async def search(self, guild_id: int, text: str, limit: int = 10) -> list:
+        """
+        Return up to ``limit`` tickets matching ``text``, best first, each
+        with the best matching passage as a snippet.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+        return await self.db.fetchall(
+            "SELECT ticket_search.ticket_id, snippet(ticket_search, 0, '**', '**', '...', 24) AS snippet, "
+            "a.channel_name, a.user_id, a.closed_at, a.message_count "
+            "FROM ticket_search LEFT JOIN ticket_archive AS a ON a.ticket_id = CAST(ticket_search.ticket_id AS INTEGER) "
+            "WHERE ticket_search MATCH ? AND ticket_search.rowid IN ("
+            "  SELECT id FROM ("
+            "    SELECT rowid AS id, rank, row_number() OVER (PARTITION BY ticket_id ORDER BY rank) AS n "
+            "    FROM ticket_search WHERE ticket_search MATCH ? AND guild_id = ?"
+            "  ) WHERE n = 1 ORDER BY rank LIMIT ?"
+            ") ORDER BY rank",
+            (query, query, guild_id, limit)
+        )
+
+    async def get(self, ticket_id: int):
+        return await self.db.fetchone("SELECT * FROM ticket_archive WHERE ticket_id = ?", (ticket_id,))
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Async cache with per-entry expiry and single-flight loading.
+
+    Concurrent lookups for a missing key share one call to the loader.
+    Results the ``is_negative`` predicate flags (errors, offline servers)
+    are kept for ``negative_ttl`` instead of ``ttl``.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float = None, maxsize: int = 1024) -> None:
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def invalidate(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get(self, key, loader, is_negative=None):
+        """
+        Return the cached value for ``key``, calling ``loader()`` on a miss.
+
+        :param key: The cache key.
+        :param loader: A zero-argument coroutine function producing the value.
+        :param is_negative: Optional predicate selecting the shorter TTL.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        task = self._inflight[key] = asyncio.create_task(self._load(key, loader, is_negative))
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader, is_negative):
+        try:
+            value = await loader()
+            ttl = self.negative_ttl if is_negative is not None and is_negative(value) else self.ttl
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+logger = logging.getLogger("discord_bot")
+
+
+class Coalescer:
+    """
+    Groups items by key and hands each group to ``flush(key, items)`` once,
+    ``window`` seconds after the first item for that key arrived.
+
+    However many items land in a window, the key costs one flush.
+    Items are collected in a list unless ``factory`` builds another
+    container with ``append``, e.g. one that keeps only a summary.
+    """
+
+    def __init__(self, window: float, flush, factory=list) -> None:
+        self.window = window
+        self.flush = flush
+        self.factory = factory
+        self.pending = {}
+        self._timers = {}
+        self._tasks = set()
+
+    def add(self, key, item) -> bool:
+        """Queue ``item`` under ``key``; returns True if it opened a new window."""
+        items = self.pending.get(key)
+        if items is not None:
+            items.append(item)
+            return False
+        items = self.pending[key] = self.factory()
+        items.append(item)
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.window, self._fire, key)
+        return True
+
+    def _fire(self, key) -> None:
+        self._timers.pop(key, None)
+        items = self.pending.pop(key, None)
+        if items:
+            task = asyncio.create_task(self._run(key, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, items) -> None:
+        try:
+            await self.flush(key, items)
+        except Exception:
+            logger.exception(f"Coalesced flush for {key!r} failed")
+
+    async def close(self) -> None:
+        """Flush everything that is still waiting for its window."""
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            self._fire(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
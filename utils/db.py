@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.migrations import MIGRATIONS
+
+logger = logging.getLogger("discord_bot")
+
+
+class Database:
+    """
+    Async front-end for the bot's SQLite database.
+
+    All writes go through a single writer thread that drains its queue and
+    commits once per batch, with each operation in its own savepoint; reads run on a small pool of read-only
+    connections, which WAL mode lets proceed while the writer is busy.
+    Statements are compiled once per connection and reused from sqlite3's
+    statement cache.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, batch_size: int = 256, cached_statements: int = 256) -> None:
+        self.path = path
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.cached_statements = cached_statements
+        self._queue = queue.Queue()
+        self._writer = None
+        self._readers = None
+        self._local = threading.local()
+        self._reader_conns = []
+        self._reader_lock = threading.Lock()
+        self.schema_version = 0
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, cached_statements=self.cached_statements, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        self._writer = threading.Thread(target=self._writer_loop, args=(loop, ready), name="db-writer", daemon=True)
+        self._writer.start()
+        await ready
+        self._readers = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="db-reader")
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, script in MIGRATIONS:
+            if target <= version:
+                continue
+            try:
+                conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {int(target)};\nCOMMIT;")
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            logger.info(f"Applied database migration {target}")
+            version = target
+        self.schema_version = version
+
+    def _writer_loop(self, loop, ready) -> None:
+        try:
+            conn = self._connect()
+            self._migrate(conn)
+        except Exception as e:
+            loop.call_soon_threadsafe(_set_exception, ready, e)
+            return
+        loop.call_soon_threadsafe(_set_result, ready, None)
+
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [op for op in batch if op is not None]
+
+            # Each op runs in its own savepoint inside the batch transaction,
+            # so one that fails part-way leaves none of its writes behind.
+            if batch and not conn.in_transaction:
+                conn.execute("BEGIN")
+            results = []
+            for func, future in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    result = func(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    results.append((future, None, e))
+                else:
+                    conn.execute("RELEASE op")
+                    results.append((future, result, None))
+            try:
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                results = [(future, None, e) for future, _, _ in results]
+
+            for future, result, exc in results:
+                if exc is None:
+                    loop.call_soon_threadsafe(_set_result, future, result)
+                else:
+                    loop.call_soon_threadsafe(_set_exception, future, exc)
+        conn.close()
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._reader_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    async def run(self, func):
+        """Run ``func(conn)`` on the writer connection as part of the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put((func, future))
+        return await future
+
+    async def execute(self, sql: str, params=()) -> int:
+        """Execute a write statement and return the last inserted row id."""
+        return await self.run(lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql: str, seq_of_params) -> int:
+        seq_of_params = list(seq_of_params)
+        return await self.run(lambda conn: conn.executemany(sql, seq_of_params).rowcount)
+
+    async def _read(self, func):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: func(self._reader()))
+
+    async def fetchone(self, sql: str, params=()):
+        return await self._read(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params=()) -> list:
+        return await self._read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._queue.put(None)
+            await asyncio.to_thread(self._writer.join)
+            self._writer = None
+        if self._readers is not None:
+            self._readers.shutdown(wait=True)
+            self._readers = None
+        with self._reader_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+
+
+def _set_result(future, result) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future, exc) -> None:
+    if not future.done():
+        future.set_exception(exc)
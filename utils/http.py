@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import math
+import random
+
+import aiohttp
+
+logger = logging.getLogger("discord_bot")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HTTPResponse:
+    __slots__ = ("status", "data")
+
+    def __init__(self, status: int, data) -> None:
+        self.status = status
+        self.data = data
+
+
+class HTTPClient:
+    """
+    Bot-wide HTTP client for external APIs.
+
+    One keep-alive connection pool is shared by every cog, with a cap on
+    connections per host, a total timeout per attempt and retries with
+    jittered exponential backoff on connection errors, timeouts, 429 and 5xx.
+    A ``Retry-After`` longer than ``max_retry_delay`` is not waited out; the
+    response is returned as it is.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        keepalive: float = 30.0,
+        max_retry_delay: float = 10.0,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.keepalive = keepalive
+        self.max_retry_delay = max_retry_delay
+        self.session = None
+
+    async def start(self) -> None:
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _delay(self, attempt: int, retry_after=None):
+        """Seconds to wait before the next attempt, or None if the server asks for longer than ``max_retry_delay``."""
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+            if delay is not None and math.isfinite(delay) and delay >= 0:
+                return delay if delay <= self.max_retry_delay else None
+        return min(self.backoff * (2 ** attempt) * (0.5 + random.random()), self.max_retry_delay)
+
+    async def request(self, method: str, url: str, *, json: bool = False, **kwargs) -> HTTPResponse:
+        """
+        Send a request and return its status, plus the decoded JSON body
+        when ``json`` is set and the response is 200.
+
+        :param method: The HTTP method.
+        :param url: The full URL.
+        :param json: Whether to decode the body as JSON.
+        """
+        if self.session is None:
+            await self.start()
+        attempt = 0
+        while True:
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    delay = None
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        delay = self._delay(attempt, response.headers.get("Retry-After"))
+                    if delay is None:
+                        data = None
+                        if json and response.status == 200:
+                            data = await response.json(content_type=None)
+                        else:
+                            # Read to the end so the connection goes back to the pool.
+                            await response.read()
+                        return HTTPResponse(response.status, data)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                logger.debug(f"{method} {url} failed ({type(e).__name__}), retrying")
+                delay = self._delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs) -> HTTPResponse:
+        return await self.request("GET", url, json=True, **kwargs)
@@ -0,0 +1,192 @@
+"""
+Minimal asyncio client for the Minecraft Java Edition Server List Ping.
+
+:func:`status` returns the same shape the mcsrvstat.us v2 API does
+(``online``, ``players``, ``version``, ``motd.clean``), so callers can use
+either source interchangeably.
+"""
+import asyncio
+import json
+import logging
+import re
+import struct
+
+try:
+    import dns.asyncresolver
+except ImportError:  # SRV lookups are skipped without dnspython
+    dns = None
+
+logger = logging.getLogger("discord_bot")
+
+DEFAULT_PORT = 25565
+PROTOCOL_VERSION = 47
+MAX_RESPONSE = 64 * 1024
+FORMATTING = re.compile("§.")
+
+
+def pack_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def unpack_varint(data: bytes, offset: int = 0) -> tuple:
+    result = shift = 0
+    while True:
+        if offset >= len(data) or shift > 28:
+            raise ValueError("Malformed varint")
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def pack_string(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return pack_varint(len(encoded)) + encoded
+
+
+def packet(packet_id: int, payload: bytes = b"") -> bytes:
+    body = pack_varint(packet_id) + payload
+    return pack_varint(len(body)) + body
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    result = shift = 0
+    while True:
+        if shift > 28:
+            raise ValueError("Malformed varint")
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+        shift += 7
+
+
+def check_port(port: int) -> int:
+    if not 0 < port <= 65535:
+        raise ValueError(f"Port {port} is out of range")
+    return port
+
+
+def split_address(address: str) -> tuple:
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host, check_port(int(port))
+    return address, None
+
+
+_warned_no_dns = False
+
+
+async def resolve_srv(host: str, timeout: float = None):
+    global _warned_no_dns
+    if dns is None:
+        if not _warned_no_dns:
+            logger.warning("dnspython is not installed; Minecraft SRV records are not resolved")
+            _warned_no_dns = True
+        return None
+    try:
+        answers = await dns.asyncresolver.resolve(f"_minecraft._tcp.{host}", "SRV", lifetime=timeout)
+    except Exception:
+        return None
+    record = min(answers, key=lambda r: (r.priority, -r.weight))
+    if not 0 < record.port <= 65535:
+        return None
+    return str(record.target).rstrip("."), record.port
+
+
+def flatten_chat(component) -> str:
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return "".join(flatten_chat(part) for part in component)
+    if isinstance(component, dict):
+        return flatten_chat(component.get("text", "")) + flatten_chat(component.get("extra", []))
+    return ""
+
+
+def field(obj: dict, key: str, kind, default):
+    value = obj.get(key, default)
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ValueError(f"Malformed status response: {key!r} is {type(value).__name__}")
+    return value
+
+
+def to_status(response) -> dict:
+    """Convert a status reply; raises ValueError if it does not have the documented shape."""
+    if not isinstance(response, dict):
+        raise ValueError(f"Malformed status response: {type(response).__name__}")
+    players = field(response, "players", dict, {})
+    version = field(response, "version", dict, {})
+    data = {
+        "online": True,
+        "players": {"online": field(players, "online", int, 0), "max": field(players, "max", int, 0)},
+        "version": FORMATTING.sub("", field(version, "name", str, "")),
+        "motd": {"clean": [line.strip() for line in FORMATTING.sub("", flatten_chat(response.get("description", ""))).split("\n")]},
+    }
+    sample = [p.get("name") for p in field(players, "sample", list, []) if isinstance(p, dict)]
+    sample = [name for name in sample if isinstance(name, str) and name]
+    if sample:
+        data["players"]["list"] = sample
+    return data
+
+
+async def query(host: str, port: int, handshake_host: str) -> dict:
+    """
+    Run the status handshake against ``host:port`` and return the converted
+    status. No timeout of its own; :func:`status` bounds the whole ping.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        handshake = pack_varint(PROTOCOL_VERSION) + pack_string(handshake_host) + struct.pack(">H", port) + pack_varint(1)
+        writer.write(packet(0x00, handshake) + packet(0x00))
+        await writer.drain()
+
+        length = await read_varint(reader)
+        if length > MAX_RESPONSE:
+            raise ValueError(f"Status response of {length} bytes is too large")
+        body = await reader.readexactly(length)
+        packet_id, offset = unpack_varint(body)
+        if packet_id != 0x00:
+            raise ValueError(f"Unexpected packet id {packet_id}")
+        size, offset = unpack_varint(body, offset)
+        try:
+            return to_status(json.loads(body[offset:offset + size].decode("utf-8")))
+        except RecursionError:
+            raise ValueError("Status response is nested too deeply") from None
+    finally:
+        writer.close()
+
+
+async def status(address: str, timeout: float = 3.0) -> dict:
+    """
+    Ping a Java server and return its status.
+
+    :param address: ``host`` or ``host:port``; without a port the
+        ``_minecraft._tcp`` SRV record is tried before port 25565.
+    :param timeout: Seconds allowed for the whole ping: SRV lookup,
+        connecting and reading the reply.
+    """
+    host, port = split_address(address)
+
+    async def ping():
+        target, target_port = host, port
+        if target_port is None:
+            srv = await resolve_srv(host, timeout)
+            if srv is not None:
+                target, target_port = srv
+            else:
+                target_port = DEFAULT_PORT
+        return await query(target, target_port, host)
+
+    return await asyncio.wait_for(ping(), timeout)
@@ -0,0 +1,106 @@
+# Versioned schema migrations for the bot database.
+# Each entry is (version, script); scripts run once, in order, and the
+# database's PRAGMA user_version records the last one applied.
+# Never edit a migration that has shipped - append a new one instead.
+
+MIGRATIONS = [
+    (1, """
+CREATE TABLE IF NOT EXISTS claim (
+    role_id INTEGER,
+    guild INTEGER,
+    claim_time INTEGER
+);
+CREATE TABLE IF NOT EXISTS gw (
+    c_id INTEGER,
+    m_id INTEGER,
+    end REAL,
+    winners INTEGER,
+    prize TEXT,
+    host INTEGER,
+    ended BOOLEAN
+);
+"""),
+    (2, """
+CREATE TABLE IF NOT EXISTS ticket_archive (
+    ticket_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER,
+    channel_name TEXT,
+    closed_by INTEGER,
+    opened_at REAL,
+    closed_at REAL,
+    message_count INTEGER,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS ticket_archive_guild ON ticket_archive (guild_id, closed_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5(
+    content,
+    author,
+    ticket_id,
+    guild_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""),
+    (3, """
+CREATE TABLE IF NOT EXISTS ticket_events (
+    guild_id INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    actor_id INTEGER,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ticket_events_guild ON ticket_events (guild_id, at);
+CREATE TABLE IF NOT EXISTS ticket_stats (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""),
+    (4, """
+CREATE TABLE IF NOT EXISTS ticket_config (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""),
+    (5, """
+CREATE TABLE IF NOT EXISTS embed_templates (
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_by INTEGER,
+    updated_at REAL,
+    PRIMARY KEY (guild_id, name)
+);
+"""),
+    (6, """
+CREATE TABLE IF NOT EXISTS polls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    author_id INTEGER,
+    question TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    closes_at REAL,
+    closed INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS polls_message ON polls (message_id);
+CREATE INDEX IF NOT EXISTS polls_open ON polls (closed, closes_at);
+CREATE TABLE IF NOT EXISTS poll_options (
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    votes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (poll_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS poll_votes (
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    at REAL NOT NULL,
+    PRIMARY KEY (poll_id, user_id)
+) WITHOUT ROWID;
+"""),
+    (7, """
+ALTER TABLE polls ADD COLUMN mode TEXT NOT NULL DEFAULT 'reactions';
+"""),
+]
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("discord_bot")
+
+
+class MessageContext:
+    """A message plus the fields every stage needs, computed once."""
+
+    __slots__ = ("message", "author_id", "guild_id", "channel_id", "content_lower", "mention_ids")
+
+    def __init__(self, message) -> None:
+        self.message = message
+        self.author_id = message.author.id
+        self.guild_id = message.guild.id if message.guild else None
+        self.channel_id = message.channel.id
+        self.content_lower = message.content.lower()
+        self.mention_ids = frozenset(user.id for user in message.mentions)
+
+
+class StageStats:
+    __slots__ = ("seen", "handled", "errors", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.seen = 0
+        self.handled = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int) -> None:
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+
+class MessagePipeline:
+    """
+    Single on_message entry point for the bot.
+
+    Cogs register a stage with an ``interest`` predicate that is checked
+    against the prepared :class:`MessageContext`; only interested stages
+    are awaited. Each stage keeps call counts and timing counters.
+    """
+
+    def __init__(self) -> None:
+        self.stages = {}
+        self.stats = {"pipeline": StageStats()}
+
+    def register(self, name: str, handler, interest=None) -> None:
+        self.stages[name] = (handler, interest)
+        self.stats.setdefault(name, StageStats())
+
+    def unregister(self, name: str) -> None:
+        self.stages.pop(name, None)
+
+    async def _run_stage(self, name: str, handler, ctx: MessageContext) -> None:
+        stats = self.stats[name]
+        stats.handled += 1
+        start = time.perf_counter_ns()
+        try:
+            await handler(ctx)
+        except Exception:
+            stats.errors += 1
+            logger.exception(f"Message stage {name} failed")
+        finally:
+            stats.record(time.perf_counter_ns() - start)
+
+    async def dispatch(self, message) -> None:
+        start = time.perf_counter_ns()
+        ctx = MessageContext(message)
+        runs = []
+        for name, (handler, interest) in self.stages.items():
+            self.stats[name].seen += 1
+            if interest is None or interest(ctx):
+                runs.append(self._run_stage(name, handler, ctx))
+        if runs:
+            await asyncio.gather(*runs)
+        total = self.stats["pipeline"]
+        total.seen += 1
+        total.handled += 1
+        total.record(time.perf_counter_ns() - start)
+
+    def report(self) -> list:
+        """Return (name, seen, handled, errors, avg_ms, max_ms) for every stage."""
+        rows = []
+        for name, stats in self.stats.items():
+            avg = stats.total_ns / stats.handled / 1e6 if stats.handled else 0.0
+            rows.append((name, stats.seen, stats.handled, stats.errors, avg, stats.max_ns / 1e6))
+        return rows
@@ -0,0 +1,187 @@
+import time
+
+
+class PollState:
+    """
+    One poll with its tallies. ``counts`` is updated on every vote, unvote
+    and change, so results cost O(options) however many people voted;
+    ``voters`` maps user id to option index to find the vote to undo.
+    """
+
+    __slots__ = ("id", "guild_id", "channel_id", "message_id", "author_id", "question",
+                 "options", "counts", "voters", "closes_at", "closed", "mode")
+
+    def __init__(self, id, guild_id, channel_id, message_id, author_id, question, options, counts=None, closes_at=None, closed=False, mode="reactions"):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.author_id = author_id
+        self.question = question
+        self.options = options
+        self.counts = counts or [0] * len(options)
+        self.voters = {}
+        self.closes_at = closes_at
+        self.closed = closed
+        self.mode = mode
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def results(self) -> list:
+        """Return ``(label, votes, share)`` per option, in option order."""
+        total = self.total
+        return [(label, count, count / total if total else 0.0) for label, count in zip(self.options, self.counts)]
+
+
+class PollEngine:
+    """
+    Polls backed by the bot database.
+
+    Open polls live in memory, indexed by id and by message id; every
+    change is applied there first and then written with matching counter
+    updates in a single write batch, so the stored tallies never need to
+    be recounted from the votes table. A change whose write fails is
+    undone in memory as well.
+    """
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self.by_id = {}
+        self.by_message = {}
+
+    def get(self, poll_id: int):
+        return self.by_id.get(poll_id)
+
+    def for_message(self, message_id: int):
+        return self.by_message.get(message_id)
+
+    def _index(self, poll: PollState) -> None:
+        self.by_id[poll.id] = poll
+        if poll.message_id is not None:
+            self.by_message[poll.message_id] = poll
+
+    async def restore(self) -> list:
+        """Load every open poll with its counters and voters."""
+        polls = {}
+        for row in await self.db.fetchall("SELECT * FROM polls WHERE closed = 0"):
+            polls[row['id']] = PollState(
+                row['id'], row['guild_id'], row['channel_id'], row['message_id'], row['author_id'],
+                row['question'], [], [], row['closes_at'], mode=row['mode']
+            )
+        if not polls:
+            return []
+        for row in await self.db.fetchall(
+            "SELECT o.poll_id, o.label, o.votes FROM poll_options AS o JOIN polls AS p ON p.id = o.poll_id "
+            "WHERE p.closed = 0 ORDER BY o.poll_id, o.idx"
+        ):
+            poll = polls[row['poll_id']]
+            poll.options.append(row['label'])
+            poll.counts.append(row['votes'])
+        for row in await self.db.fetchall(
+            "SELECT v.poll_id, v.user_id, v.idx FROM poll_votes AS v JOIN polls AS p ON p.id = v.poll_id WHERE p.closed = 0"
+        ):
+            polls[row['poll_id']].voters[row['user_id']] = row['idx']
+        for poll in polls.values():
+            self._index(poll)
+        return list(polls.values())
+
+    async def create(self, guild_id, channel_id, author_id, question, options, closes_at=None, mode="reactions") -> PollState:
+        def insert(conn):
+            poll_id = conn.execute(
+                "INSERT INTO polls (guild_id, channel_id, author_id, question, created_at, closes_at, mode) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, channel_id, author_id, question, time.time(), closes_at, mode)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO poll_options (poll_id, idx, label) VALUES (?, ?, ?)",
+                [(poll_id, idx, label) for idx, label in enumerate(options)]
+            )
+            return poll_id
+
+        poll = PollState(await self.db.run(insert), guild_id, channel_id, None, author_id, question, list(options), closes_at=closes_at, mode=mode)
+        self._index(poll)
+        return poll
+
+    async def attach(self, poll: PollState, message_id: int) -> None:
+        poll.message_id = message_id
+        self._index(poll)
+        await self.db.execute("UPDATE polls SET message_id = ? WHERE id = ?", (message_id, poll.id))
+
+    async def vote(self, poll: PollState, user_id: int, idx: int):
+        """
+        Record ``user_id``'s vote for option ``idx``, replacing any earlier
+        vote. Returns the previous option index or None.
+        """
+        previous = poll.voters.get(user_id)
+        if poll.closed or previous == idx:
+            return previous
+        poll.voters[user_id] = idx
+        poll.counts[idx] += 1
+        if previous is not None:
+            poll.counts[previous] -= 1
+
+        def write(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO poll_votes (poll_id, user_id, idx, at) VALUES (?, ?, ?, ?)",
+                (poll.id, user_id, idx, time.time())
+            )
+            conn.execute("UPDATE poll_options SET votes = votes + 1 WHERE poll_id = ? AND idx = ?", (poll.id, idx))
+            if previous is not None:
+                conn.execute("UPDATE poll_options SET votes = votes - 1 WHERE poll_id = ? AND idx = ?", (poll.id, previous))
+
+        try:
+            await self.db.run(write)
+        except BaseException:
+            poll.counts[idx] -= 1
+            if previous is None:
+                poll.voters.pop(user_id, None)
+            else:
+                poll.voters[user_id] = previous
+                poll.counts[previous] += 1
+            raise
+        return previous
+
+    async def unvote(self, poll: PollState, user_id: int, idx: int = None) -> bool:
+        """Withdraw ``user_id``'s vote, only if it is for ``idx`` when given."""
+        current = poll.voters.get(user_id)
+        if poll.closed or current is None or (idx is not None and current != idx):
+            return False
+        del poll.voters[user_id]
+        poll.counts[current] -= 1
+
+        def write(conn):
+            conn.execute("DELETE FROM poll_votes WHERE poll_id = ? AND user_id = ?", (poll.id, user_id))
+            conn.execute("UPDATE poll_options SET votes = votes - 1 WHERE poll_id = ? AND idx = ?", (poll.id, current))
+
+        try:
+            await self.db.run(write)
+        except BaseException:
+            poll.voters[user_id] = current
+            poll.counts[current] += 1
+            raise
+        return True
+
+    async def close(self, poll: PollState) -> bool:
+        if poll.closed:
+            return False
+        poll.closed = True
+        self.by_id.pop(poll.id, None)
+        self.by_message.pop(poll.message_id, None)
+        await self.db.execute("UPDATE polls SET closed = 1, closes_at = ? WHERE id = ?", (time.time(), poll.id))
+        return True
+
+    async def load(self, poll_id: int):
+        """Return an open poll from memory or a closed one from the database."""
+        poll = self.by_id.get(poll_id)
+        if poll is not None:
+            return poll
+        row = await self.db.fetchone("SELECT * FROM polls WHERE id = ?", (poll_id,))
+        if row is None:
+            return None
+        options = await self.db.fetchall("SELECT label, votes FROM poll_options WHERE poll_id = ? ORDER BY idx", (poll_id,))
+        return PollState(
+            row['id'], row['guild_id'], row['channel_id'], row['message_id'], row['author_id'], row['question'],
+            [option['label'] for option in options], [option['votes'] for option in options],
+            row['closes_at'], bool(row['closed']), row['mode']
+        )
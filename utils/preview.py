@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger("discord_bot")
+
+
+class PreviewRenderer:
+    """
+    Debounced message edits for live previews.
+
+    ``schedule`` records the latest embed for a message and returns at
+    once. Each message gets at most one edit per ``window`` seconds: the
+    first change goes out immediately, later ones within the window are
+    coalesced so only the newest is sent when it ends. Payloads equal to
+    the last one sent are skipped.
+    """
+
+    def __init__(self, window: float = 1.0, maxsize: int = 1024) -> None:
+        self.window = window
+        self.maxsize = maxsize
+        self._pending = {}
+        self._tasks = {}
+        self._sent = OrderedDict()
+        self.scheduled = 0
+        self.edits = 0
+
+    def schedule(self, message, embed: discord.Embed = None, **kwargs) -> None:
+        """Queue ``message.edit(embed=embed, **kwargs)``, replacing any edit still waiting."""
+        self.scheduled += 1
+        if embed is not None:
+            kwargs["embed"] = embed
+        payload = {key: value.to_dict() if isinstance(value, discord.Embed) else value for key, value in kwargs.items() if key != "view"}
+        if message.id not in self._pending:
+            sent = self._sent.get(message.id)
+            if sent is not None and sent[0] == payload and "view" not in kwargs:
+                return
+        self._pending[message.id] = (message, kwargs, payload)
+        if message.id not in self._tasks:
+            self._tasks[message.id] = asyncio.create_task(self._run(message.id))
+
+    async def _run(self, message_id: int) -> None:
+        try:
+            while message_id in self._pending:
+                sent = self._sent.get(message_id)
+                if sent is not None:
+                    delay = sent[1] + self.window - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                message, kwargs, payload = self._pending.pop(message_id)
+                if sent is not None and sent[0] == payload and "view" not in kwargs:
+                    continue
+                try:
+                    await message.edit(**kwargs)
+                    self.edits += 1
+                except discord.NotFound:
+                    self._sent.pop(message_id, None)
+                    self._pending.pop(message_id, None)
+                    return
+                except discord.HTTPException as e:
+                    # Keep the window but forget the payload, so scheduling
+                    # the same embed again retries instead of being skipped.
+                    logger.warning(f"Preview edit for message {message_id} failed: {e}")
+                    payload = None
+                self._sent[message_id] = (payload, time.monotonic())
+                self._sent.move_to_end(message_id)
+                while len(self._sent) > self.maxsize:
+                    self._sent.popitem(last=False)
+        finally:
+            self._tasks.pop(message_id, None)
+
+    def cancel(self, message_id: int) -> None:
+        """Drop any queued edit for a message, e.g. before replacing it with a final version."""
+        self._pending.pop(message_id, None)
+        task = self._tasks.pop(message_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def flush(self) -> None:
+        """Wait for every queued edit to be sent."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def close(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._pending.clear()
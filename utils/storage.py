@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("discord_bot")
+
+
+def _atomic_write(path: str, text: str) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str, default):
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error loading JSON file {path}: {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while loading {path}: {e}")
+    return json.loads(json.dumps(default))
+
+
+class JsonStore:
+    """
+    In-memory JSON document that is written back to disk in the background.
+
+    Cogs mutate ``store.data`` directly and call ``mark_dirty()``; the owning
+    :class:`Storage` flushes the document with an atomic rename.
+    """
+
+    def __init__(self, storage, name: str, path: str, data, indent=4) -> None:
+        self.storage = storage
+        self.name = name
+        self.path = path
+        self.data = data
+        self.indent = indent
+        self.pending = 0
+        self.dirty_since = None
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self) -> None:
+        if self.pending == 0:
+            self.dirty_since = time.monotonic()
+        self.pending += 1
+        if self.pending >= self.storage.max_pending:
+            self.storage.wake()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if self.pending == 0:
+                return
+            # Serialise on the loop so the snapshot is consistent, write off it.
+            text = json.dumps(self.data, indent=self.indent)
+            self.pending = 0
+            self.dirty_since = None
+            try:
+                await asyncio.to_thread(_atomic_write, self.path, text)
+            except Exception as e:
+                logger.error(f"Failed to write {self.path}: {e}")
+                self.mark_dirty()
+
+
+class Storage:
+    """
+    Write-behind persistence for the JSON files under ``database/``.
+
+    Dirty stores are flushed every ``flush_interval`` seconds, or immediately
+    once a store has collected ``max_pending`` changes.
+    """
+
+    def __init__(self, root: str = "database", flush_interval: float = 5.0, max_pending: int = 50) -> None:
+        self.root = root
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.stores = {}
+        self._released = {}
+        self._wakeup = None
+        self._task = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _revive(self, name: str):
+        store = self.stores.get(name)
+        if store is None and name in self._released:
+            # Re-opened while its last flush is still in flight; keep using it.
+            store = self.stores[name] = self._released.pop(name)
+        return store
+
+    def open(self, name: str, default=None, indent=4) -> JsonStore:
+        store = self._revive(name)
+        if store is not None:
+            return store
+        path = self._path(name)
+        data = _read_json(path, {} if default is None else default)
+        store = self.stores[name] = JsonStore(self, name, path, data, indent)
+        return store
+
+    async def load(self, name: str, default=None, indent=4) -> JsonStore:
+        store = self._revive(name)
+        if store is not None:
+            return store
+        path = self._path(name)
+        data = await asyncio.to_thread(_read_json, path, {} if default is None else default)
+        store = self._revive(name)
+        if store is not None:
+            return store
+        store = self.stores[name] = JsonStore(self, name, path, data, indent)
+        return store
+
+    def release(self, name: str) -> None:
+        """Stop tracking a store, writing out any pending changes first."""
+        store = self.stores.pop(name, None)
+        if store is None or store.pending == 0:
+            return
+        self._released[name] = store
+        task = asyncio.create_task(store.flush())
+        task.add_done_callback(lambda _: self._forget(name, store))
+
+    def _forget(self, name: str, store: JsonStore) -> None:
+        if self._released.get(name) is store:
+            del self._released[name]
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            now = time.monotonic()
+            for store in list(self.stores.values()):
+                if store.pending >= self.max_pending or (
+                    store.dirty_since is not None and now - store.dirty_since >= self.flush_interval
+                ):
+                    await store.flush()
+
+    async def flush_all(self) -> None:
+        for store in list(self.stores.values()) + list(self._released.values()):
+            await store.flush()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_all()
@@ -0,0 +1,72 @@
+import re
+
+import discord
+
+PLACEHOLDER = re.compile(r"\{(guild|member_count|user|channel)\}")
+
+
+def compile_string(text: str):
+    """Split ``text`` into literal and placeholder parts, or return it unchanged if it has none."""
+    parts = []
+    last = 0
+    for match in PLACEHOLDER.finditer(text):
+        parts.append(text[last:match.start()])
+        parts.append((match.group(1),))
+        last = match.end()
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return parts
+
+
+class CompiledTemplate:
+    """
+    An embed payload built once from a saved template.
+
+    Strings containing placeholders are pre-split so rendering is a join
+    over their parts; everything else in the payload is shared between
+    renders. A template without placeholders renders to the same payload
+    every time.
+    """
+
+    __slots__ = ("name", "payload", "slots", "variables")
+
+    def __init__(self, name: str, embed: discord.Embed) -> None:
+        self.name = name
+        self.payload = embed.to_dict()
+        self.slots = []
+        self.variables = set()
+        self._scan(self.payload, ())
+
+    def _scan(self, node, path) -> None:
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, value in items:
+            if isinstance(value, str):
+                compiled = compile_string(value)
+                if compiled is not value:
+                    self.slots.append((path, key, compiled))
+                    self.variables.update(part[0] for part in compiled if isinstance(part, tuple))
+            elif isinstance(value, (dict, list)):
+                self._scan(value, path + (key,))
+
+    def render(self, values: dict) -> discord.Embed:
+        if not self.slots:
+            return discord.Embed.from_dict(self.payload)
+        payload = dict(self.payload)
+        copied = {(): payload}
+        for path, key, parts in self.slots:
+            container = self._writable(payload, path, copied)
+            container[key] = "".join(part if isinstance(part, str) else str(values.get(part[0], "{" + part[0] + "}")) for part in parts)
+        return discord.Embed.from_dict(payload)
+
+    @staticmethod
+    def _writable(payload, path, copied):
+        """Copy only the containers on ``path`` so the shared payload is never modified."""
+        node = payload
+        for depth in range(1, len(path) + 1):
+            prefix = path[:depth]
+            if prefix not in copied:
+                child = node[path[depth - 1]]
+                copied[prefix] = node[path[depth - 1]] = dict(child) if isinstance(child, dict) else list(child)
+            node = copied[prefix]
+        return node
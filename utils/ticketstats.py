@@ -0,0 +1,100 @@
+import math
+
+from utils.timeseries import Rollup
+
+OPEN = 0
+REPLY = 1
+CLOSE = 2
+
+
+class ResponseHistogram:
+    """
+    Log-scale histogram of durations in seconds. Each bucket is 15% wider
+    than the last, so quantiles are within about 7% of the exact value
+    while memory stays at a few dozen counters however many samples arrive.
+    """
+
+    BASE = 1.15
+    SIZE = 160
+
+    def __init__(self) -> None:
+        self.counts = [0] * self.SIZE
+        self.total = 0
+
+    def add(self, seconds: float) -> None:
+        index = min(int(math.log1p(max(seconds, 0)) / math.log(self.BASE)), self.SIZE - 1)
+        self.counts[index] += 1
+        self.total += 1
+
+    def quantile(self, q: float):
+        if not self.total:
+            return None
+        target = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.BASE ** (index + 0.5) - 1
+        return None
+
+    def pack(self) -> dict:
+        return {str(i): count for i, count in enumerate(self.counts) if count}
+
+    def unpack(self, data: dict) -> None:
+        for index, count in data.items():
+            self.counts[int(index)] = count
+        self.total = sum(self.counts)
+
+
+class GuildTicketStats:
+    """
+    Running ticket aggregates for one guild, updated per event so reading
+    them never touches the event log: totals, open backlog, first-response
+    distribution and a week of hourly opened/closed counts.
+    """
+
+    def __init__(self) -> None:
+        self.opened = 0
+        self.closed = 0
+        self.backlog = 0
+        self.first_response = ResponseHistogram()
+        self.opened_hourly = Rollup(3600, 24 * 7)
+        self.closed_hourly = Rollup(3600, 24 * 7)
+
+    def apply(self, kind: int, at: float, opened_at: float = None) -> None:
+        if kind == OPEN:
+            self.opened += 1
+            self.backlog += 1
+            self.opened_hourly.add(at, 1, 0)
+        elif kind == REPLY:
+            self.first_response.add(at - opened_at)
+        elif kind == CLOSE:
+            self.closed += 1
+            self.backlog = max(self.backlog - 1, 0)
+            self.closed_hourly.add(at, 1, 0)
+
+    def hourly(self, now: float, hours: int = 24) -> tuple:
+        """Return per-hour (opened, closed) counts for the last ``hours`` hours, oldest first."""
+        opened = [bucket[0] for bucket in self.opened_hourly.series(now, hours)]
+        closed = [bucket[0] for bucket in self.closed_hourly.series(now, hours)]
+        return opened, closed
+
+    def pack(self) -> dict:
+        return {
+            "opened": self.opened,
+            "closed": self.closed,
+            "backlog": self.backlog,
+            "first_response": self.first_response.pack(),
+            "opened_hourly": self.opened_hourly.pack(),
+            "closed_hourly": self.closed_hourly.pack(),
+        }
+
+    def unpack(self, data: dict) -> None:
+        self.opened = data.get("opened", 0)
+        self.closed = data.get("closed", 0)
+        self.backlog = data.get("backlog", 0)
+        self.first_response.unpack(data.get("first_response", {}))
+        if "opened_hourly" in data:
+            self.opened_hourly.unpack(data["opened_hourly"])
+        if "closed_hourly" in data:
+            self.closed_hourly.unpack(data["closed_hourly"])
@@ -0,0 +1,100 @@
+import base64
+from array import array
+
+SPARK = "▁▂▃▄▅▆▇█"
+MAX_PLAYERS = 2 ** 32 - 1
+
+
+class Rollup:
+    """
+    Fixed-size ring of time buckets, each keeping sample count, sum, peak
+    and last capacity in parallel arrays. Adding a sample touches one slot.
+    """
+
+    FIELDS = (("starts", "q"), ("count", "L"), ("total", "Q"), ("peak", "L"), ("capacity", "L"))
+
+    def __init__(self, resolution: int, size: int) -> None:
+        self.resolution = resolution
+        self.size = size
+        for name, code in self.FIELDS:
+            setattr(self, name, array(code, bytes(array(code).itemsize * size)))
+
+    def add(self, ts: float, online: int, capacity: int) -> None:
+        # Servers report whatever they like; keep counts inside the unsigned arrays.
+        online = min(max(int(online), 0), MAX_PLAYERS)
+        capacity = min(max(int(capacity), 0), MAX_PLAYERS)
+        start = int(ts) // self.resolution * self.resolution
+        slot = start // self.resolution % self.size
+        if self.starts[slot] != start:
+            self.starts[slot] = start
+            self.count[slot] = 0
+            self.total[slot] = 0
+            self.peak[slot] = 0
+        self.count[slot] += 1
+        self.total[slot] += online
+        if online > self.peak[slot]:
+            self.peak[slot] = online
+        self.capacity[slot] = capacity
+
+    def series(self, now: float, buckets: int, group: int = 1) -> list:
+        """
+        Return ``(count, total, peak, capacity)`` for the last ``buckets``
+        buckets up to ``now``, oldest first, merging every ``group`` buckets.
+        """
+        res = self.resolution
+        newest = int(now) // res * res
+        out = []
+        for g in range(buckets // group):
+            count = total = peak = capacity = 0
+            for i in range(group):
+                start = newest - (buckets - 1 - g * group - i) * res
+                slot = start // res % self.size
+                if self.starts[slot] != start or not self.count[slot]:
+                    continue
+                count += self.count[slot]
+                total += self.total[slot]
+                peak = max(peak, self.peak[slot])
+                capacity = self.capacity[slot]
+            out.append((count, total, peak, capacity))
+        return out
+
+    def pack(self) -> dict:
+        return {name: base64.b64encode(getattr(self, name).tobytes()).decode() for name, _ in self.FIELDS}
+
+    def unpack(self, data: dict) -> None:
+        for name, code in self.FIELDS:
+            values = array(code)
+            values.frombytes(base64.b64decode(data[name]))
+            if len(values) == self.size:
+                setattr(self, name, values)
+
+
+class ServerHistory:
+    """Player counts for one server at 1-minute, 1-hour and 1-day resolution."""
+
+    ROLLUPS = (("minute", 60, 24 * 60), ("hour", 3600, 24 * 31), ("day", 86400, 366))
+
+    def __init__(self) -> None:
+        self.rollups = {name: Rollup(resolution, size) for name, resolution, size in self.ROLLUPS}
+
+    def add(self, ts: float, online: int, capacity: int) -> None:
+        for rollup in self.rollups.values():
+            rollup.add(ts, online, capacity)
+
+    def pack(self) -> dict:
+        return {name: rollup.pack() for name, rollup in self.rollups.items()}
+
+    def unpack(self, data: dict) -> None:
+        for name, rollup in self.rollups.items():
+            if name in data:
+                rollup.unpack(data[name])
+
+
+def sparkline(values: list) -> str:
+    """Render numbers as a one-line bar chart; ``None`` marks a gap."""
+    present = [v for v in values if v is not None]
+    if not present:
+        return ""
+    low, high = min(present), max(present)
+    span = (high - low) or 1
+    return "".join(" " if v is None else SPARK[int((v - low) / span * (len(SPARK) - 1))] for v in values)
@@ -0,0 +1,113 @@
+import gzip
+import html
+import json
+import tempfile
+
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background: #313338; color: #dbdee1; }}
+.msg {{ margin: 6px 0; }} .meta {{ color: #949ba4; font-size: 12px; }}
+.author {{ font-weight: bold; color: #f2f3f5; }} .extra {{ margin-left: 16px; color: #b5bac1; }}
+</style></head><body><h2>{title}</h2>
+"""
+HTML_FOOT = "</body></html>\n"
+
+
+def to_record(message) -> dict:
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "created_at": message.created_at.isoformat(),
+        "content": message.content,
+        "attachments": [
+            {"filename": a.filename, "url": a.url, "size": a.size} for a in message.attachments
+        ],
+        "embeds": [embed.to_dict() for embed in message.embeds],
+    }
+
+
+class Transcript:
+    __slots__ = ("file", "filename", "count")
+
+    def __init__(self, file, filename, count):
+        self.file = file
+        self.filename = filename
+        self.count = count
+
+
+class TranscriptExporter:
+    """
+    Streams a channel's history into a spooled temporary file.
+
+    Messages are written one at a time as ``channel.history`` pages them
+    in, so memory use stays at ``max_memory`` plus one page however long
+    the channel is; larger transcripts spill to disk. Output can be plain
+    text, HTML or JSON lines, optionally gzip-compressed.
+    """
+
+    FORMATS = ("txt", "html", "jsonl")
+
+    def __init__(self, fmt="txt", compress=False, max_memory=1024 * 1024, progress=None, progress_every=500):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown transcript format: {fmt}")
+        self.fmt = fmt
+        self.compress = compress
+        self.max_memory = max_memory
+        self.progress = progress
+        self.progress_every = progress_every
+
+    def render(self, message) -> str:
+        if self.fmt == "jsonl":
+            return json.dumps(to_record(message)) + "\n"
+
+        if self.fmt == "html":
+            parts = [
+                f'<div class="msg"><span class="meta">{message.created_at:%Y-%m-%d %H:%M:%S}</span> '
+                f'<span class="author">{html.escape(str(message.author))}</span>: '
+                f'{html.escape(message.content).replace(chr(10), "<br>")}'
+            ]
+            for a in message.attachments:
+                parts.append(f'<div class="extra">Attachment: <a href="{html.escape(a.url)}">{html.escape(a.filename)}</a></div>')
+            for embed in message.embeds:
+                parts.append(f'<div class="extra">Embed: {html.escape(embed.title or "")} {html.escape(embed.description or "")}</div>')
+            parts.append("</div>\n")
+            return "".join(parts)
+
+        lines = [f"{message.created_at} - {message.author}: {message.content}\n"]
+        for a in message.attachments:
+            lines.append(f"    [attachment] {a.filename} {a.url}\n")
+        for embed in message.embeds:
+            lines.append(f"    [embed] {embed.title or ''} {embed.description or ''}\n")
+        return "".join(lines)
+
+    async def export(self, channel, archive=None) -> Transcript:
+        """
+        Write ``channel``'s history to a spooled file.
+
+        :param archive: Optional :class:`utils.archive.ArchiveWriter` that is
+            fed every message in the same pass.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=self.max_memory)
+        out = gzip.GzipFile(fileobj=spool, mode="wb") if self.compress else spool
+        title = html.escape(f"Transcript of #{channel.name}")
+        if self.fmt == "html":
+            out.write(HTML_HEAD.format(title=title).encode("utf-8"))
+
+        count = 0
+        async for message in channel.history(limit=None, oldest_first=True):
+            out.write(self.render(message).encode("utf-8"))
+            if archive is not None:
+                await archive.add(message)
+            count += 1
+            if self.progress is not None and count % self.progress_every == 0:
+                await self.progress(count)
+
+        if self.fmt == "html":
+            out.write(HTML_FOOT.encode("utf-8"))
+        if self.compress:
+            out.close()
+        spool.seek(0)
+        filename = f"transcript-{channel.name}.{self.fmt}{'.gz' if self.compress else ''}"
+        return Transcript(spool, filename, count)
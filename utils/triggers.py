@@ -0,0 +1,167 @@
+import re
+
+MODES = ("exact", "contains", "word", "wildcard")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class _Trigger:
+    __slots__ = ("trigger", "mode", "value", "key", "regex")
+
+    def __init__(self, trigger: str, mode: str, value, key: str, regex) -> None:
+        self.trigger = trigger
+        self.mode = mode
+        self.value = value
+        self.key = key
+        self.regex = regex
+
+
+class TriggerIndex:
+    """
+    Compiled index over auto-respond triggers.
+
+    Exact triggers are a dict lookup. Substring, word and wildcard triggers
+    share one Aho-Corasick automaton keyed on their literal text (the
+    longest literal segment, for wildcards), so a message is scanned once
+    regardless of how many triggers exist. Adding a trigger only extends the
+    trie; failure links are rebuilt lazily on the next match.
+    """
+
+    def __init__(self) -> None:
+        self.triggers = {}
+        self._exact = {}
+        self._always = {}
+        self._goto = [{}]
+        self._out = [set()]
+        self._fail = [0]
+        self._link = [0]
+        self._stale = False
+        self._garbage = 0
+
+    def __len__(self) -> int:
+        return len(self.triggers)
+
+    def __contains__(self, trigger: str) -> bool:
+        return trigger in self.triggers
+
+    def add(self, trigger: str, value, mode: str = "exact") -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown trigger mode: {mode}")
+        if not trigger and mode in ("contains", "word"):
+            raise ValueError(f"A {mode} trigger can't be empty")
+        if trigger in self.triggers:
+            self.remove(trigger)
+
+        key, regex = trigger, None
+        if mode == "wildcard":
+            regex = re.compile(".*".join(re.escape(part) for part in trigger.split("*")), re.DOTALL)
+            key = max(trigger.split("*"), key=len)
+        entry = self.triggers[trigger] = _Trigger(trigger, mode, value, key, regex)
+
+        if mode == "exact":
+            self._exact[trigger] = entry
+        elif not key:
+            self._always[trigger] = entry
+        else:
+            self._insert(key, trigger)
+
+    def remove(self, trigger: str) -> None:
+        entry = self.triggers.pop(trigger, None)
+        if entry is None:
+            return
+        if entry.mode == "exact":
+            del self._exact[trigger]
+        elif not entry.key:
+            del self._always[trigger]
+        else:
+            node = self._walk(entry.key)
+            self._out[node].discard(trigger)
+            self._garbage += len(entry.key)
+            if self._garbage > 1024 and self._garbage > len(self._goto):
+                self._rebuild()
+
+    def _walk(self, key: str) -> int:
+        node = 0
+        for ch in key:
+            node = self._goto[node][ch]
+        return node
+
+    def _insert(self, key: str, trigger: str) -> None:
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._out.append(set())
+                self._fail.append(0)
+                self._link.append(0)
+                self._stale = True
+            node = nxt
+        self._out[node].add(trigger)
+        self._stale = True
+
+    def _rebuild(self) -> None:
+        # Drop trie nodes left behind by removed triggers.
+        live = [entry for entry in self.triggers.values() if entry.mode != "exact" and entry.key]
+        self._goto, self._out, self._fail, self._link = [{}], [set()], [0], [0]
+        self._garbage = 0
+        for entry in live:
+            self._insert(entry.key, entry.trigger)
+
+    def _link_failures(self) -> None:
+        goto, fail, link, out = self._goto, self._fail, self._link, self._out
+        queue = list(goto[0].values())
+        for node in queue:
+            fail[node] = 0
+            link[node] = 0
+        for node in queue:
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[child] = target if target != child else 0
+                link[child] = fail[child] if out[fail[child]] else link[fail[child]]
+                queue.append(child)
+        self._stale = False
+
+    def _confirm(self, entry: _Trigger, text: str, end: int) -> bool:
+        if entry.mode == "contains":
+            return True
+        if entry.mode == "word":
+            start = end - len(entry.key)
+            return (start == 0 or not _is_word_char(text[start - 1])) and (
+                end == len(text) or not _is_word_char(text[end])
+            )
+        return entry.regex.fullmatch(text) is not None
+
+    def match(self, text: str):
+        """Return the value of the first trigger matching ``text`` (already lowercased), or None."""
+        entry = self._exact.get(text)
+        if entry is not None:
+            return entry.value
+        if self._stale:
+            self._link_failures()
+
+        goto, fail, link, out, triggers = self._goto, self._fail, self._link, self._out, self.triggers
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else link[node]
+            while hit:
+                for trigger in out[hit]:
+                    entry = triggers[trigger]
+                    if self._confirm(entry, text, i + 1):
+                        return entry.value
+                hit = link[hit]
+
+        for entry in self._always.values():
+            if entry.regex.fullmatch(text):
+                return entry.value
+        return None